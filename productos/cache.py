@@ -0,0 +1,78 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+CLAVE_VERSION_CATEGORIAS = 'categorias:version'
+
+
+def duracion_version():
+    # En una caché por proceso la invalidación no llega a otros workers: la versión caduca
+    return None if settings.CACHE_COMPARTIDA else settings.CATEGORIAS_CACHE_SEGUNDOS
+
+
+def version_categorias():
+    version = cache.get(CLAVE_VERSION_CATEGORIAS)
+    if version is None:
+        cache.add(CLAVE_VERSION_CATEGORIAS, time.time_ns(), duracion_version())
+        version = cache.get(CLAVE_VERSION_CATEGORIAS)
+    return version
+
+
+async def aversion_categorias():
+    version = await cache.aget(CLAVE_VERSION_CATEGORIAS)
+    if version is None:
+        await cache.aadd(CLAVE_VERSION_CATEGORIAS, time.time_ns(), duracion_version())
+        version = await cache.aget(CLAVE_VERSION_CATEGORIAS)
+    return version
+
+
+def invalidar_categorias():
+    # Una versión nueva (no un contador) para no reutilizar claves si la caché se vacía
+    cache.set(CLAVE_VERSION_CATEGORIAS, time.time_ns(), duracion_version())
+
+
+def clave_respuesta(huella):
+    return f'categorias:respuesta:{huella}'
+
+
+def coincide_etag(request, etag, cabecera='If-None-Match'):
+    etags = parse_etags(request.headers.get(cabecera, ''))
+    return '*' in etags or etag in etags
+
+
+def etag_producto(id_producto, version, version_cat=None):
+    # Incluye la versión de categorías porque el detalle muestra su nombre
+    if version_cat is None:
+        version_cat = version_categorias()
+    return f'"producto-{id_producto}-{version}-{version_cat}"'
+
+
+class RespuestaCacheadaMixin:
+    """
+    Guarda en caché los datos serializados de GET con una versión global que
+    se cambia al crear, editar o borrar; responde 304 si el ETag coincide.
+    """
+
+    def respuesta_cacheada(self, request, generar):
+        version = version_categorias()
+        huella, headers = self.huella_respuesta(request, version)
+
+        if coincide_etag(request, headers['ETag']):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        clave = clave_respuesta(huella)
+        datos = cache.get(clave)
+        if datos is None:
+            datos = generar()
+            cache.set(clave, datos, settings.CATEGORIAS_CACHE_SEGUNDOS)
+        return Response(datos, headers=headers)
+
+    @staticmethod
+    def huella_respuesta(request, version):
+        huella = hashlib.md5(f'{version}:{request.get_full_path()}'.encode()).hexdigest()
+        return huella, {'ETag': f'"{huella}"', 'Cache-Control': 'private, no-cache'}
@@ -0,0 +1,115 @@
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from rest_framework import serializers
+
+from productos.models import Producto
+
+
+ORDENES = {
+    'reciente': ('-fecha_creacion', '-id_producto'),
+    'precio': ('precio', 'id_producto'),
+    '-precio': ('-precio', '-id_producto'),
+}
+
+
+def leer_orden(params):
+    orden = params.get('orden', 'reciente')
+    if orden not in ORDENES:
+        raise serializers.ValidationError({'orden': f'Usa uno de: {", ".join(ORDENES)}.'})
+    return ORDENES[orden]
+
+
+def leer_filtros(params, vendido='false'):
+    """
+    Valida los filtros del catálogo desde la query string. Con
+    `vendido=None` la falta del parámetro no filtra por vendido.
+    """
+    errores = {}
+    filtros = {'categoria': None, 'estado': params.get('estado') or None}
+
+    if params.get('categoria'):
+        try:
+            filtros['categoria'] = int(params['categoria'])
+        except ValueError:
+            errores['categoria'] = 'Debe ser un ID de categoría.'
+
+    for nombre in ('precio_min', 'precio_max'):
+        filtros[nombre] = None
+        if params.get(nombre):
+            try:
+                filtros[nombre] = Decimal(params[nombre])
+            except InvalidOperation:
+                errores[nombre] = 'Debe ser un número.'
+                continue
+            if not filtros[nombre].is_finite():
+                errores[nombre] = 'Debe ser un número.'
+
+    vendido = params.get('vendido', vendido)
+    if vendido is None:
+        filtros['vendido'] = None
+    elif vendido.lower() not in ('true', 'false'):
+        errores['vendido'] = 'Usa true o false.'
+    else:
+        filtros['vendido'] = vendido.lower() == 'true'
+
+    if errores:
+        raise serializers.ValidationError(errores)
+    return filtros
+
+
+def consultar_grupos(vendido, precio_min, precio_max):
+    """
+    Conteo por (categoría, estado) en un solo GROUP BY, sin aplicar los
+    filtros de categoría y estado: así sirve para cualquier selección de
+    ambos y se puede cachear solo por precio y vendido.
+    """
+    return list(
+        Producto.objects.filtrar(vendido=vendido, precio_min=precio_min, precio_max=precio_max)
+        .order_by()
+        .values_list('id_categoria', 'id_categoria__nombre', 'estado')
+        .annotate(total=Count('id_producto'))
+    )
+
+
+def grupos_facetas(vendido, precio_min, precio_max):
+    clave = f'catalogo:facetas:{vendido}:{precio_min}:{precio_max}'
+    grupos = cache.get(clave)
+    if grupos is None:
+        grupos = consultar_grupos(vendido, precio_min, precio_max)
+        cache.set(clave, grupos, settings.CATALOGO_FACETAS_SEGUNDOS)
+    return grupos
+
+
+def calcular_facetas(filtros):
+    """
+    Facetas disyuntivas: los conteos de categoría respetan el estado elegido
+    (y viceversa) pero no su propio filtro, para poder cambiar de opción.
+    """
+    categoria, estado = filtros['categoria'], filtros['estado']
+    categorias = defaultdict(int)
+    nombres = {}
+    estados = defaultdict(int)
+
+    for id_categoria, nombre, estado_grupo, total in grupos_facetas(
+        filtros['vendido'], filtros['precio_min'], filtros['precio_max']
+    ):
+        if not estado or estado_grupo == estado:
+            categorias[id_categoria] += total
+            nombres[id_categoria] = nombre
+        if not categoria or id_categoria == categoria:
+            estados[estado_grupo] += total
+
+    return {
+        'categorias': [
+            {'id_categoria': id_categoria, 'nombre': nombres[id_categoria], 'total': total}
+            for id_categoria, total in sorted(categorias.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'estados': [
+            {'estado': estado_grupo, 'total': total}
+            for estado_grupo, total in sorted(estados.items(), key=lambda item: (-item[1], item[0]))
+        ],
+    }
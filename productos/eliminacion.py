@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from productos.inventario import aplicar_delta, contribucion, sumar
+from productos.models import ImagenProducto, Producto
+from productos.tareas import encolar_purga
+
+
+def eliminar_productos(ids, negocio=None):
+    """
+    Marca los productos como eliminados con un solo UPDATE y descuenta sus
+    totales del inventario. Las filas, sus imágenes y los archivos los borra
+    después la purga. Devuelve los IDs marcados.
+    """
+    with transaction.atomic():
+        queryset = Producto.objects.select_for_update().filter(pk__in=ids)
+        if negocio is not None:
+            queryset = queryset.filter(id_negocio=negocio)
+        productos = list(
+            queryset.only('id_producto', 'id_negocio', 'precio', 'cantidad', 'vendido').order_by('pk')
+        )
+        if not productos:
+            return []
+
+        marcados = [producto.pk for producto in productos]
+        Producto.objects.filter(pk__in=marcados).update(
+            eliminado_en=timezone.now(),
+            version=F('version') + 1
+        )
+
+        deltas = defaultdict(list)
+        for producto in productos:
+            deltas[producto.id_negocio_id].append(contribucion(producto, signo=-1))
+        for id_negocio, cambios in deltas.items():
+            aplicar_delta(id_negocio, sumar(*cambios))
+
+        encolar_purga()
+    return marcados
+
+
+def eliminar_imagenes(ids, negocio=None):
+    """Marca imágenes como eliminadas en un UPDATE y cambia la versión de sus productos."""
+    with transaction.atomic():
+        queryset = ImagenProducto.objects.filter(pk__in=ids, id_producto__eliminado_en__isnull=True)
+        if negocio is not None:
+            queryset = queryset.filter(id_producto__id_negocio=negocio)
+        filas = list(queryset.values_list('id_imagen', 'id_producto'))
+        if not filas:
+            return []
+
+        marcadas = [id_imagen for id_imagen, _ in filas]
+        ImagenProducto.objects.filter(pk__in=marcadas).update(eliminado_en=timezone.now())
+        Producto.objects.filter(pk__in={id_producto for _, id_producto in filas}).incrementar_version()
+
+        encolar_purga()
+    return marcadas
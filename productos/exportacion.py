@@ -0,0 +1,89 @@
+import csv
+import json
+from collections import defaultdict
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from productos.importacion import SEPARADOR_URLS_CSV
+from productos.models import ImagenProducto
+
+# Mismas columnas que acepta la importación, más las de solo lectura
+COLUMNAS = [
+    'id_producto',
+    'nombre',
+    'descripcion',
+    'precio',
+    'cantidad',
+    'estado',
+    'vendido',
+    'id_categoria',
+    'fecha_creacion',
+    'imagenes_urls',
+]
+
+
+class Eco:
+    """Buffer de csv.writer que devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def filas_exportacion(queryset, request, tamano_bloque):
+    """
+    Recorre los productos con un cursor del servidor y devuelve bloques de
+    filas (dicts). Las imágenes se leen con una consulta por bloque.
+    """
+    filas = queryset.order_by('id_producto').values_list(*COLUMNAS[:-1]).iterator(chunk_size=tamano_bloque)
+    almacenamiento = ImagenProducto._meta.get_field('imagen_url').storage
+
+    while True:
+        bloque = list(islice(filas, tamano_bloque))
+        if not bloque:
+            return
+
+        imagenes = defaultdict(list)
+        consulta = ImagenProducto.objects.filter(
+            id_producto__in=[fila[0] for fila in bloque]
+        ).order_by('id_imagen').values_list('id_producto', 'imagen_url')
+        for id_producto, nombre in consulta:
+            imagenes[id_producto].append(request.build_absolute_uri(almacenamiento.url(nombre)))
+
+        yield [
+            {
+                **dict(zip(COLUMNAS, fila)),
+                'precio': str(fila[3]),
+                'fecha_creacion': fila[8].isoformat(),
+                'imagenes_urls': imagenes[fila[0]],
+            }
+            for fila in bloque
+        ]
+
+
+def exportar_csv(bloques):
+    escritor = csv.DictWriter(Eco(), fieldnames=COLUMNAS)
+    yield escritor.writeheader()
+    for bloque in bloques:
+        yield ''.join(
+            escritor.writerow({**fila, 'imagenes_urls': SEPARADOR_URLS_CSV.join(fila['imagenes_urls'])})
+            for fila in bloque
+        )
+
+
+def exportar_jsonl(bloques):
+    for bloque in bloques:
+        yield ''.join(json.dumps(fila, ensure_ascii=False) + '\n' for fila in bloque)
+
+
+async def en_async(partes):
+    """
+    Con ASGI, Django cargaría entero un iterador síncrono antes de enviarlo;
+    así cada bloque se genera en el hilo de la conexión y se envía al momento.
+    """
+    siguiente = sync_to_async(next)
+    while True:
+        parte = await siguiente(partes, None)
+        if parte is None:
+            return
+        yield parte
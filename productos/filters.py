@@ -0,0 +1,16 @@
+from rest_framework import filters
+
+
+class BusquedaProductoFilter(filters.SearchFilter):
+    """
+    Búsqueda de texto completo sobre nombre y descripción.
+
+    En PostgreSQL usa el vector `busqueda` (índice GIN) ordenado por relevancia;
+    en SQLite recurre a icontains para poder probar en local.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        termino = ' '.join(self.get_search_terms(request))
+        if not termino:
+            return queryset
+        return queryset.buscar(termino)
@@ -0,0 +1,115 @@
+import time
+from decimal import ROUND_DOWN, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Max, Min, Value, When
+from django.db.models.functions import Cast, Floor, Least
+from django.utils import timezone
+
+from productos.models import HistogramaPrecio, Producto
+
+CENTAVO = Decimal('0.01')
+
+
+def particion(minimo, maximo, cubetas):
+    """
+    (ancho, número de cubetas) de un grupo. Un rango de menos de `cubetas`
+    centavos usa menos cubetas, de un centavo; el ancho se redondea hacia
+    abajo para que ninguna cubeta empiece después del máximo. Con todos los
+    precios iguales es (0, 1).
+    """
+    if maximo <= minimo:
+        return Decimal(0), 1
+    cubetas = max(min(cubetas, int((maximo - minimo) / CENTAVO)), 1)
+    return ((maximo - minimo) / cubetas).quantize(CENTAVO, rounding=ROUND_DOWN), cubetas
+
+
+def anchos(limites, cubetas):
+    return {grupo: particion(minimo, maximo, cubetas) for grupo, (minimo, maximo) in limites.items()}
+
+
+def indice_cubeta(minimo, ancho, cubetas):
+    if not ancho:
+        return Value(0)
+    desplazamiento = (F('precio') - Value(minimo)) / Value(ancho)
+    return Cast(
+        Least(Floor(desplazamiento), Value(cubetas - 1)),
+        output_field=IntegerField()
+    )
+
+
+def contar(queryset, limites, anchos_grupo, por_categoria):
+    if por_categoria:
+        indice = Case(
+            *[
+                When(id_categoria=grupo, then=indice_cubeta(limites[grupo][0], *anchos_grupo[grupo]))
+                for grupo in limites
+            ],
+            output_field=IntegerField()
+        )
+        filas = queryset.annotate(indice=indice).values_list('id_categoria', 'indice')
+        return {(grupo, indice): total for grupo, indice, total in filas.annotate(total=Count('id_producto'))}
+
+    indice = indice_cubeta(limites[None][0], *anchos_grupo[None])
+    filas = queryset.annotate(indice=indice).values_list('indice')
+    return {(None, indice): total for indice, total in filas.annotate(total=Count('id_producto'))}
+
+
+def refrescar_histograma(cubetas=None, tiempos=None):
+    """
+    Recalcula HISTOGRAMA_PRECIOS con cubetas de igual ancho entre el precio
+    mínimo y máximo de cada categoría y del catálogo completo.
+
+    Son cuatro consultas agregadas sobre PRODUCTOS (límites y conteos, por
+    categoría y globales) y un reemplazo de la tabla en una transacción.
+    Si se pasa `tiempos` (dict) se anota la duración de cada paso.
+    """
+    cubetas = cubetas or settings.HISTOGRAMA_CUBETAS
+    tiempos = {} if tiempos is None else tiempos
+    disponibles = Producto.objects.filter(vendido=False).order_by()
+
+    def medir(paso, funcion):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos[paso] = (time.perf_counter() - inicio) * 1000
+        return resultado
+
+    limites = medir('limites', lambda: {
+        fila['id_categoria']: (fila['minimo'], fila['maximo'])
+        for fila in disponibles.values('id_categoria').annotate(minimo=Min('precio'), maximo=Max('precio'))
+    })
+    if not limites:
+        with transaction.atomic():
+            HistogramaPrecio.objects.all().delete()
+        return []
+
+    limites_globales = medir('limites_globales', lambda: disponibles.aggregate(minimo=Min('precio'), maximo=Max('precio')))
+    anchos_grupo = anchos(limites, cubetas)
+    anchos_globales = anchos({None: (limites_globales['minimo'], limites_globales['maximo'])}, cubetas)
+
+    totales = medir('conteo', lambda: contar(disponibles, limites, anchos_grupo, True))
+    totales.update(medir('conteo_global', lambda: contar(
+        disponibles, {None: (limites_globales['minimo'], limites_globales['maximo'])}, anchos_globales, False
+    )))
+
+    ahora = timezone.now()
+    filas = []
+    for grupo, (minimo, maximo) in [*limites.items(), (None, (limites_globales['minimo'], limites_globales['maximo']))]:
+        ancho, cantidad = anchos_globales[None] if grupo is None else anchos_grupo[grupo]
+        for indice in range(cantidad):
+            filas.append(HistogramaPrecio(
+                id_categoria_id=grupo,
+                cubeta=indice,
+                desde=minimo + ancho * indice,
+                hasta=maximo if indice == cantidad - 1 else minimo + ancho * (indice + 1),
+                total=totales.get((grupo, indice), 0),
+                fecha_calculo=ahora
+            ))
+
+    def reemplazar():
+        with transaction.atomic():
+            HistogramaPrecio.objects.all().delete()
+            return HistogramaPrecio.objects.bulk_create(filas)
+
+    return medir('escritura', reemplazar)
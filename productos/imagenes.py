@@ -0,0 +1,76 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Lado mayor en píxeles de cada variante generada
+VARIANTES = {
+    'thumb': 200,
+    'medium': 600,
+    'full': 1600,
+}
+
+# Campo de ImagenProducto donde se guarda cada variante
+CAMPOS_VARIANTES = {
+    'thumb': 'imagen_thumb',
+    'medium': 'imagen_medium',
+    'full': 'imagen_url',
+}
+
+# Campo de ImagenProducto con el ancho real de cada variante
+CAMPOS_ANCHO = {
+    'thumb': 'ancho_thumb',
+    'medium': 'ancho_medium',
+    'full': 'ancho_full',
+}
+
+EXTENSIONES = {
+    'WEBP': 'webp',
+    'JPEG': 'jpg',
+}
+
+
+def nombre_variante(nombre_original, variante):
+    base = os.path.splitext(os.path.basename(nombre_original))[0]
+    return f"{base}_{variante}.{EXTENSIONES[settings.IMAGENES_FORMATO]}"
+
+
+def generar_variantes(archivo):
+    """
+    Devuelve {variante: (ContentFile, ancho)} con la imagen reescalada (sin
+    agrandarla) y codificada en IMAGENES_FORMATO, y su ancho final en píxeles.
+    """
+    formato = settings.IMAGENES_FORMATO
+    variantes = {}
+
+    with Image.open(archivo) as original:
+        original = ImageOps.exif_transpose(original)
+        if formato == 'JPEG' or original.mode not in ('RGB', 'RGBA'):
+            original = original.convert('RGB' if formato == 'JPEG' else 'RGBA')
+
+        for variante, lado in VARIANTES.items():
+            copia = original.copy()
+            copia.thumbnail((lado, lado), Image.Resampling.LANCZOS)
+            buffer = BytesIO()
+            copia.save(buffer, format=formato, quality=settings.IMAGENES_CALIDAD)
+            variantes[variante] = (
+                ContentFile(buffer.getvalue(), name=nombre_variante(archivo.name, variante)),
+                copia.width
+            )
+
+    return variantes
+
+
+def armar_srcset(candidatos):
+    """
+    srcset con los pares (url, ancho) de ancho conocido. Como las variantes
+    no se agrandan, varias pueden medir lo mismo: se deja la primera (la más
+    ligera). Devuelve None si ningún candidato tiene ancho.
+    """
+    por_ancho = {}
+    for url, ancho in candidatos:
+        if url and ancho:
+            por_ancho.setdefault(ancho, url)
+    return ', '.join(f'{url} {ancho}w' for ancho, url in por_ancho.items()) or None
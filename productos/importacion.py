@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+
+from productos.inventario import aplicar_delta, contribucion, sumar
+from productos.models import ImagenProducto, Producto
+from productos.serializers import ProductoImportSerializer
+
+SEPARADOR_URLS_CSV = '|'
+
+
+def leer_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    for fila in csv.DictReader(texto):
+        fila = {clave: valor for clave, valor in fila.items() if valor not in (None, '')}
+        if 'imagenes_urls' in fila:
+            fila['imagenes_urls'] = [
+                url.strip() for url in fila['imagenes_urls'].split(SEPARADOR_URLS_CSV) if url.strip()
+            ]
+        yield fila
+
+
+def leer_jsonl(archivo):
+    for linea in io.TextIOWrapper(archivo, encoding='utf-8-sig'):
+        if not linea.strip():
+            continue
+        try:
+            yield json.loads(linea)
+        except ValueError:
+            yield linea
+
+
+def importar_productos(filas, negocio, tamano_lote=None, context=None):
+    """
+    Valida cada fila con las reglas de ProductoCreateSerializer y escribe en
+    lotes con bulk_create dentro de una sola transacción.
+
+    Si alguna fila es inválida no se guarda nada; se siguen validando las
+    demás para devolver todos los errores. Devuelve (creados, errores).
+    """
+    tamano_lote = tamano_lote or settings.IMPORTACION_TAMANO_LOTE
+    serializador = ProductoImportSerializer(context=context or {})
+    errores = []
+    creados = 0
+    lote = []
+
+    def escribir(lote):
+        productos = Producto.objects.bulk_create([producto for producto, _ in lote])
+        ImagenProducto.objects.bulk_create([
+            ImagenProducto(id_producto=producto, imagen_url=url)
+            for producto, urls in lote
+            for url in dict.fromkeys(urls)
+        ], batch_size=tamano_lote)
+        Producto.objects.filter(pk__in=[producto.pk for producto in productos]).actualizar_busqueda()
+        aplicar_delta(negocio.pk, sumar(*(contribucion(producto) for producto in productos)))
+        return len(productos)
+
+    with transaction.atomic():
+        for numero, fila in enumerate(filas, start=1):
+            try:
+                datos = serializador.run_validation(fila)
+            except serializers.ValidationError as exc:
+                errores.append({'fila': numero, 'errores': exc.detail})
+                continue
+            except ValueError as exc:
+                errores.append({'fila': numero, 'errores': [str(exc)]})
+                continue
+
+            if errores:
+                # Ya no se va a guardar nada: solo se validan las filas restantes
+                continue
+
+            urls = datos.pop('imagenes_urls', [])
+            lote.append((Producto(id_negocio=negocio, **datos), urls))
+            if len(lote) >= tamano_lote:
+                creados += escribir(lote)
+                lote = []
+
+        if errores:
+            transaction.set_rollback(True)
+            return 0, errores
+
+        if lote:
+            creados += escribir(lote)
+
+    return creados, errores
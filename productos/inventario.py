@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from productos.models import Producto, ResumenInventario
+
+CAMPOS = ('total_productos', 'total_vendidos', 'unidades_stock', 'valor_inventario')
+
+VALOR = ExpressionWrapper(F('precio') * F('cantidad'), output_field=DecimalField(max_digits=16, decimal_places=2))
+
+AGREGADOS = {
+    'total_productos': Count('id_producto'),
+    'total_vendidos': Count('id_producto', filter=Q(vendido=True)),
+    'unidades_stock': Coalesce(Sum('cantidad'), 0),
+    'valor_inventario': Coalesce(Sum(VALOR), Decimal('0'), output_field=DecimalField(max_digits=16, decimal_places=2)),
+}
+
+
+def contribucion(producto, signo=1):
+    """Lo que aporta un producto a los totales de su negocio."""
+    return {
+        'total_productos': signo,
+        'total_vendidos': signo if producto.vendido else 0,
+        'unidades_stock': signo * producto.cantidad,
+        'valor_inventario': signo * Decimal(producto.precio) * producto.cantidad,
+    }
+
+
+def sumar(*deltas):
+    return {campo: sum((delta[campo] for delta in deltas), 0) for campo in CAMPOS}
+
+
+def diferencia(antes, despues):
+    return {campo: despues[campo] - antes[campo] for campo in CAMPOS}
+
+
+def aplicar_delta(id_negocio, delta):
+    """
+    Suma `delta` al resumen del negocio con un UPDATE atómico. Si el negocio
+    aún no tiene resumen, se calcula completo (ya incluye este cambio).
+    """
+    if not any(delta.values()):
+        return
+    actualizados = ResumenInventario.objects.filter(id_negocio=id_negocio).update(
+        fecha_actualizacion=timezone.now(),
+        **{campo: F(campo) + valor for campo, valor in delta.items() if valor}
+    )
+    if not actualizados:
+        reconstruir_negocio(id_negocio)
+
+
+def reconstruir_negocio(id_negocio):
+    totales = Producto.objects.filter(id_negocio=id_negocio).aggregate(**AGREGADOS)
+    resumen, _ = ResumenInventario.objects.update_or_create(id_negocio_id=id_negocio, defaults=totales)
+    return resumen
+
+
+def reconstruir_todo():
+    filas = Producto.objects.order_by().values('id_negocio').annotate(**AGREGADOS)
+    ResumenInventario.objects.all().delete()
+    return ResumenInventario.objects.bulk_create(
+        [ResumenInventario(id_negocio_id=fila.pop('id_negocio'), **fila) for fila in filas],
+        batch_size=1000
+    )
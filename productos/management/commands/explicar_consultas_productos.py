@@ -0,0 +1,92 @@
+import itertools
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+
+from productos.models import Producto
+
+ORDENAMIENTOS = [
+    None,
+    ('-fecha_creacion', '-id_producto'),
+    ('fecha_creacion',),
+    ('precio',),
+    ('-precio',),
+    ('nombre',),
+    ('-nombre',),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN (ANALYZE en PostgreSQL) sobre cada forma de consulta que '
+        'puede generar mis-productos e indica cuáles siguen recorriendo la tabla.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--negocio', type=int, help='ID del negocio (por defecto el de más productos)')
+        parser.add_argument('--detalle', action='store_true', help='Imprime el plan completo de cada consulta')
+
+    def handle(self, *args, **options):
+        negocio = options['negocio'] or self.negocio_mas_grande()
+        base = Producto.objects.filter(id_negocio=negocio)
+        muestra = base.values('id_categoria', 'estado').first()
+        if muestra is None:
+            raise CommandError(f'El negocio {negocio} no tiene productos.')
+
+        vendor = connections[base.db].vendor
+        opciones = {'analyze': True} if vendor == 'postgresql' else {}
+        con_problemas = 0
+
+        combinaciones = itertools.product(
+            [None, muestra['id_categoria']],
+            [None, muestra['estado']],
+            [None, True, False],
+            ORDENAMIENTOS
+        )
+        for categoria, estado, vendido, orden in combinaciones:
+            queryset = base.filtrar(categoria=categoria, estado=estado, vendido=vendido)
+            if orden:
+                queryset = queryset.order_by(*orden)
+            plan = queryset[:10].explain(**opciones)
+
+            problemas = self.analizar_plan(plan, vendor)
+            con_problemas += bool(problemas)
+            forma = (
+                f'categoria={categoria or "-"} estado={estado or "-"} '
+                f'vendido={"-" if vendido is None else vendido} orden={",".join(orden or ["Meta"])}'
+            )
+            if problemas:
+                self.stdout.write(self.style.WARNING(f'{" ".join(problemas):<10} {forma}'))
+            else:
+                self.stdout.write(f'{"OK":<10} {forma}')
+            if options['detalle']:
+                self.stdout.write(plan + '\n')
+
+        self.stdout.write(f'\n{con_problemas} formas de consulta con scan o sort sobre PRODUCTOS')
+
+    def negocio_mas_grande(self):
+        fila = (
+            Producto.objects.values('id_negocio')
+            .annotate(total=Count('id_producto'))
+            .order_by('-total')
+            .first()
+        )
+        if fila is None:
+            raise CommandError('No hay productos para analizar.')
+        return fila['id_negocio']
+
+    def analizar_plan(self, plan, vendor):
+        problemas = []
+        if vendor == 'postgresql':
+            if 'Seq Scan on "PRODUCTOS"' in plan:
+                problemas.append('SCAN')
+            if 'Sort' in plan:
+                problemas.append('SORT')
+        else:
+            lineas = plan.splitlines()
+            if any('SCAN PRODUCTOS' in linea and 'INDEX' not in linea for linea in lineas):
+                problemas.append('SCAN')
+            if any('TEMP B-TREE' in linea for linea in lineas):
+                problemas.append('SORT')
+        return problemas
@@ -0,0 +1,251 @@
+import random
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Prefetch, Q
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from productos.catalogo import consultar_grupos
+from productos.histograma import refrescar_histograma
+from productos.models import Categoria, ImagenProducto, Producto
+from productos.serializers import (
+    ProductoCreateSerializer,
+    ProductoListaRapidaSerializer,
+    ProductoSerializer,
+    ProductoUpdateSerializer
+)
+from usuarios.models import Usuario
+
+PALABRAS = [
+    'cobre', 'aluminio', 'chatarra', 'hierro', 'bronce', 'acero', 'cable',
+    'motor', 'radiador', 'tubo', 'lamina', 'bateria', 'viga', 'rin', 'perfil',
+]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide el rendimiento de operaciones de productos con datos sintéticos (se revierten al terminar).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenario', choices=['busqueda', 'imagenes', 'serializador', 'catalogo', 'histograma'])
+        parser.add_argument('--tamanos', nargs='+', type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        escenario = getattr(self, f"medir_{options['escenario']}")
+        try:
+            with transaction.atomic():
+                negocio, categoria = self.crear_contexto()
+                escenario(negocio, categoria, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def crear_contexto(self):
+        negocio = Usuario.objects.create_user(
+            nombre_negocio='__benchmark__',
+            correo='benchmark@example.com',
+            password=None,
+            telefono='0000000000',
+            direccion='benchmark'
+        )
+        categoria = Categoria.objects.create(nombre='__benchmark__')
+        return negocio, categoria
+
+    def poblar(self, negocio, categoria, desde, hasta, lote=5000):
+        for inicio in range(desde, hasta, lote):
+            Producto.objects.bulk_create([
+                Producto(
+                    nombre=' '.join(random.sample(PALABRAS, 2)),
+                    descripcion=' '.join(random.choices(PALABRAS, k=12)),
+                    precio=Decimal(random.randint(100, 1_000_000)) / 100,
+                    cantidad=random.randint(0, 50),
+                    id_negocio=negocio,
+                    id_categoria=categoria,
+                )
+                for _ in range(inicio, min(inicio + lote, hasta))
+            ])
+        Producto.objects.filter(id_negocio=negocio).actualizar_busqueda()
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE "PRODUCTOS"')
+
+    def cronometrar(self, queryset, repeticiones, consulta=None):
+        consulta = consulta or (lambda: list(queryset[:10]))
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            consulta()
+            tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        return tiempos[len(tiempos) // 2] * 1000, tiempos[int(len(tiempos) * 0.95) - 1] * 1000
+
+    def medir_busqueda(self, negocio, categoria, options):
+        if any(tamano <= 0 for tamano in options['tamanos']):
+            raise CommandError('Los tamaños deben ser positivos.')
+
+        self.stdout.write(f'{"productos":>10} {"termino":>10} {"icontains p50/p95 ms":>24} {"buscar() p50/p95 ms":>24}')
+        actual = 0
+        for tamano in sorted(options['tamanos']):
+            self.poblar(negocio, categoria, actual, tamano)
+            actual = tamano
+            base = Producto.objects.filter(id_negocio=negocio)
+
+            for termino in ['cobre', 'rad', 'bronce motor']:
+                filtro = Q()
+                for palabra in termino.split():
+                    filtro &= Q(nombre__icontains=palabra) | Q(descripcion__icontains=palabra)
+                anterior = self.cronometrar(base.filter(filtro), options['repeticiones'])
+                nuevo = self.cronometrar(base.buscar(termino), options['repeticiones'])
+                self.stdout.write(
+                    f'{tamano:>10} {termino:>10} '
+                    f'{anterior[0]:>11.2f}/{anterior[1]:<12.2f} {nuevo[0]:>11.2f}/{nuevo[1]:<12.2f}'
+                )
+
+    def medir_imagenes(self, negocio, categoria, options):
+        contexto = {'request': SimpleNamespace(user=negocio)}
+        self.stdout.write(f'{"imagenes":>9} {"antes (consultas)":>18} {"ahora (consultas)":>18} {"reenvío (consultas)":>20}')
+
+        for total in [1, 5, 20]:
+            urls = [f'https://example.com/{total}/{i}.jpg' for i in range(total)]
+            datos = {
+                'nombre': 'Lote de cobre',
+                'descripcion': 'benchmark',
+                'precio': '10.00',
+                'cantidad': 1,
+                'id_categoria': categoria.pk,
+                'imagenes_urls': urls,
+            }
+
+            with CaptureQueriesContext(connection) as antes:
+                producto = Producto.objects.create(
+                    nombre='Lote de cobre', descripcion='benchmark', precio=10, cantidad=1,
+                    id_negocio=negocio, id_categoria=categoria
+                )
+                for url in urls:
+                    ImagenProducto.objects.create(id_producto=producto, imagen_url=url)
+
+            serializador = ProductoCreateSerializer(data=datos, context=contexto)
+            serializador.is_valid(raise_exception=True)
+            with CaptureQueriesContext(connection) as ahora:
+                producto = serializador.save()
+
+            serializador = ProductoUpdateSerializer(
+                producto, data={**datos, 'vendido': False}, context=contexto
+            )
+            serializador.is_valid(raise_exception=True)
+            with CaptureQueriesContext(connection) as reenvio:
+                serializador.save()
+
+            self.stdout.write(
+                f'{total:>9} {len(antes.captured_queries):>18} '
+                f'{len(ahora.captured_queries):>18} {len(reenvio.captured_queries):>20}'
+            )
+
+    def medir_serializador(self, negocio, categoria, options):
+        paginas = [10, 100, 1000]
+        self.poblar(negocio, categoria, 0, max(paginas))
+        ImagenProducto.objects.bulk_create([
+            ImagenProducto(
+                id_producto_id=id_producto,
+                imagen_url=f'productos/{id_producto}_{i}.webp',
+                imagen_thumb=f'productos/variantes/{id_producto}_{i}_thumb.webp' if i else '',
+                imagen_medium=f'productos/variantes/{id_producto}_{i}_medium.webp' if i else '',
+                ancho_thumb=200 if i else None,
+                ancho_medium=600 if i else None,
+                ancho_full=1600 if i else None,
+            )
+            for id_producto in Producto.objects.filter(id_negocio=negocio).values_list('id_producto', flat=True)
+            for i in range(2)
+        ])
+
+        request = RequestFactory().get('/')
+        request.get_host = lambda: 'localhost'
+        contexto = {'request': request}
+        base = Producto.objects.filter(id_negocio=negocio).order_by('-fecha_creacion', '-id_producto')
+        completa = base.select_related('id_categoria', 'id_negocio').prefetch_related(
+            Prefetch('imagenes', queryset=ImagenProducto.objects.order_by('id_imagen'))
+        )
+        renderer = JSONRenderer()
+
+        self.stdout.write(f'{"pagina":>7} {"ProductoSerializer obj/s":>25} {"rápido obj/s":>14} {"mejora":>7}')
+        for pagina in paginas:
+            def drf():
+                return renderer.render(ProductoSerializer(list(completa[:pagina]), many=True, context=contexto).data)
+
+            def rapido():
+                filas = list(ProductoListaRapidaSerializer.consulta(base)[:pagina])
+                return renderer.render(ProductoListaRapidaSerializer(filas, context=contexto).data)
+
+            if drf() != rapido():
+                raise CommandError(f'El serializador rápido no produce el mismo JSON con {pagina} productos.')
+
+            repeticiones = max(3, options['repeticiones'] * 10 // pagina)
+            tasas = []
+            for funcion in (drf, rapido):
+                tiempos = []
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    funcion()
+                    tiempos.append(time.perf_counter() - inicio)
+                tasas.append(pagina / sorted(tiempos)[len(tiempos) // 2])
+            self.stdout.write(f'{pagina:>7} {tasas[0]:>25.0f} {tasas[1]:>14.0f} {tasas[1] / tasas[0]:>6.1f}x')
+
+    def medir_catalogo(self, negocio, categoria, options):
+        if any(tamano <= 0 for tamano in options['tamanos']):
+            raise CommandError('Los tamaños deben ser positivos.')
+
+        categorias = [categoria] + [
+            Categoria.objects.create(nombre=f'__benchmark_{i}__') for i in range(9)
+        ]
+        self.stdout.write(f'{"productos":>10} {"consulta":>24} {"p50/p95 ms":>18}')
+        actual = 0
+        for tamano in sorted(options['tamanos']):
+            self.poblar(negocio, categoria, actual, tamano)
+            actual = tamano
+            for i, otra in enumerate(categorias[1:], start=1):
+                Producto.objects.filter(id_negocio=negocio, id_producto__endswith=str(i)).update(id_categoria=otra)
+            Producto.objects.filter(id_negocio=negocio, cantidad=0).update(vendido=True)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE "PRODUCTOS"')
+
+            casos = {
+                'primera página': Producto.objects.filtrar(vendido=False),
+                'categoría': Producto.objects.filtrar(categoria=categorias[3].pk, vendido=False),
+                'precio 10-500': Producto.objects.filtrar(vendido=False, precio_min=10, precio_max=500),
+            }
+            for nombre, queryset in casos.items():
+                queryset = queryset.order_by('-fecha_creacion', '-id_producto')
+                p50, p95 = self.cronometrar(queryset, options['repeticiones'])
+                self.stdout.write(f'{tamano:>10} {nombre:>24} {p50:>8.2f}/{p95:<9.2f}')
+
+            # Sin caché: el peor caso, cuando vence CATALOGO_FACETAS_SEGUNDOS
+            p50, p95 = self.cronometrar(None, options['repeticiones'], lambda: consultar_grupos(False, None, None))
+            self.stdout.write(f'{tamano:>10} {"facetas (sin caché)":>24} {p50:>8.2f}/{p95:<9.2f}')
+
+    def medir_histograma(self, negocio, categoria, options):
+        if any(tamano <= 0 for tamano in options['tamanos']):
+            raise CommandError('Los tamaños deben ser positivos.')
+
+        self.stdout.write(f'{"productos":>10} {"límites ms":>11} {"conteos ms":>11} {"escritura ms":>13} {"total ms":>9}')
+        actual = 0
+        for tamano in sorted(options['tamanos']):
+            self.poblar(negocio, categoria, actual, tamano)
+            actual = tamano
+            tiempos = {}
+            refrescar_histograma(tiempos=tiempos)
+            limites = tiempos['limites'] + tiempos['limites_globales']
+            conteos = tiempos['conteo'] + tiempos['conteo_global']
+            self.stdout.write(
+                f'{tamano:>10} {limites:>11.2f} {conteos:>11.2f} {tiempos["escritura"]:>13.2f} '
+                f'{sum(tiempos.values()):>9.2f}'
+            )
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from productos.models import TrabajoImagen
+from productos.tareas import procesar_trabajo
+
+
+class Command(BaseCommand):
+    help = (
+        'Procesa los trabajos de imagen pendientes (por ejemplo, los que quedaron '
+        'en cola al reiniciar el servidor) y reintenta los atascados en "procesando".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--atascados-minutos', type=int, default=15,
+            help='Minutos tras los cuales un trabajo en "procesando" se considera abandonado'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(minutes=options['atascados_minutos'])
+        reintentados = TrabajoImagen.objects.filter(
+            estado='procesando', fecha_actualizacion__lt=limite
+        ).update(estado='pendiente')
+        if reintentados:
+            self.stdout.write(f'{reintentados} trabajos atascados vuelven a la cola')
+
+        completados = errores = 0
+        pendientes = TrabajoImagen.objects.filter(estado='pendiente').order_by('id_trabajo')
+        for id_trabajo in pendientes.values_list('id_trabajo', flat=True).iterator():
+            trabajo = procesar_trabajo(id_trabajo)
+            if trabajo is None:
+                continue
+            if trabajo.estado == 'completado':
+                completados += 1
+            else:
+                errores += 1
+
+        self.stdout.write(self.style.SUCCESS(f'{completados} trabajos completados, {errores} con error'))
@@ -0,0 +1,67 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga HTTP contra un servidor ya levantado. Para comparar, '
+        'levanta el mismo número de workers con gunicorn sync y con '
+        '"gunicorn -k uvicorn.workers.UvicornWorker" (LECTURA_ASYNC=True) y ejecuta '
+        'la misma prueba contra cada uno.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url')
+        parser.add_argument('--token', help='Token de autenticación')
+        parser.add_argument('--concurrencia', nargs='+', type=int, default=[1, 10, 50, 100])
+        parser.add_argument('--duracion', type=float, default=10.0, help='Segundos por nivel de concurrencia')
+
+    def handle(self, *args, **options):
+        headers = {'Authorization': f"Token {options['token']}"} if options['token'] else {}
+        self.stdout.write(f'{"concurrencia":>12} {"peticiones/s":>13} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errores":>8}')
+
+        for concurrencia in options['concurrencia']:
+            latencias, errores = self.ejecutar(options['url'], headers, concurrencia, options['duracion'])
+            latencias.sort()
+            total = len(latencias)
+            if not total:
+                self.stdout.write(f'{concurrencia:>12} {"-":>13} {"-":>8} {"-":>8} {"-":>8} {errores:>8}')
+                continue
+
+            def percentil(p):
+                return latencias[min(total - 1, int(total * p))] * 1000
+
+            self.stdout.write(
+                f'{concurrencia:>12} {total / options["duracion"]:>13.1f} '
+                f'{percentil(0.50):>8.1f} {percentil(0.95):>8.1f} {percentil(0.99):>8.1f} {errores:>8}'
+            )
+
+    def ejecutar(self, url, headers, concurrencia, duracion):
+        latencias = []
+        errores = 0
+        lock = threading.Lock()
+        fin = time.perf_counter() + duracion
+
+        def cliente():
+            nonlocal errores
+            while time.perf_counter() < fin:
+                inicio = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30) as respuesta:
+                        respuesta.read()
+                    with lock:
+                        latencias.append(time.perf_counter() - inicio)
+                except (urllib.error.URLError, OSError):
+                    with lock:
+                        errores += 1
+
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            for _ in range(concurrencia):
+                pool.submit(cliente)
+
+        return latencias, errores
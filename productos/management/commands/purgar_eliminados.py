@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from productos.tareas import purgar_eliminados
+
+
+class Command(BaseCommand):
+    help = (
+        'Borra por lotes los productos e imágenes marcados como eliminados y sus '
+        'archivos. Necesario si PURGA_RETENCION_MINUTOS > 0 o tras reiniciar el servidor.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=settings.PURGA_TAMANO_LOTE, help='Filas por transacción')
+        parser.add_argument(
+            '--retencion-minutos', type=int, default=settings.PURGA_RETENCION_MINUTOS,
+            help='Solo purga lo eliminado hace más de estos minutos'
+        )
+
+    def handle(self, *args, **options):
+        productos, imagenes, archivos = purgar_eliminados(
+            tamano_lote=options['lote'],
+            retencion_minutos=options['retencion_minutos']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{productos} productos y {imagenes} imágenes purgados, {archivos} archivos borrados'
+        ))
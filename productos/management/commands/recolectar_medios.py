@@ -0,0 +1,58 @@
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from productos.medios import buscar_huerfanos
+from productos.models import ImagenProducto
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Busca en el almacenamiento los archivos de imágenes que ya no referencia '
+        'IMAGENES_PRODUCTOS ni TRABAJOS_IMAGENES, informa cuánto espacio ocupan y '
+        'los borra (salvo con --dry-run). Pensado para ejecutarse periódicamente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Solo informa, no borra nada')
+        parser.add_argument('--lote', type=int, default=1000, help='Archivos comprobados por consulta')
+        parser.add_argument(
+            '--gracia-minutos', type=int, default=60,
+            help='Ignora archivos modificados hace menos de estos minutos'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser positivo.')
+
+        almacenamiento = ImagenProducto._meta.get_field('imagen_url').storage
+        limite = timezone.now() - timedelta(minutes=options['gracia_minutos'])
+        huerfanos = borrados = total_bytes = 0
+
+        for nombre, tamano in buscar_huerfanos(almacenamiento, limite, options['lote']):
+            huerfanos += 1
+            total_bytes += tamano
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'{nombre} ({tamano} bytes)')
+            if options['dry_run']:
+                continue
+            try:
+                almacenamiento.delete(nombre)
+                borrados += 1
+            except Exception:
+                logger.warning('No se pudo borrar el archivo %s', nombre, exc_info=True)
+
+        megas = total_bytes / (1024 * 1024)
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'{huerfanos} archivos huérfanos, {total_bytes} bytes ({megas:.2f} MB) recuperables '
+                '(dry-run: no se borró nada)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{borrados} de {huerfanos} archivos huérfanos borrados, {total_bytes} bytes ({megas:.2f} MB) liberados'
+            ))
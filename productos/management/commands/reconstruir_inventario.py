@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from productos.inventario import reconstruir_negocio, reconstruir_todo
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula RESUMENES_INVENTARIO desde PRODUCTOS. Úsalo tras cargas '
+        'hechas fuera de la API o si se sospecha que los contadores divergieron.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--negocio', type=int, help='Recalcula solo este negocio')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options['negocio']:
+            resumen = reconstruir_negocio(options['negocio'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Negocio {resumen.id_negocio_id}: {resumen.total_productos} productos, '
+                f'{resumen.unidades_stock} unidades, valor {resumen.valor_inventario}'
+            ))
+            return
+
+        resumenes = reconstruir_todo()
+        self.stdout.write(self.style.SUCCESS(f'{len(resumenes)} negocios recalculados'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from productos.histograma import refrescar_histograma
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula HISTOGRAMA_PRECIOS desde los productos disponibles. Pensado '
+        'para ejecutarse periódicamente (cron); muestra cuánto tarda cada paso.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cubetas', type=int, help='Cubetas por categoría (por defecto HISTOGRAMA_CUBETAS)')
+
+    def handle(self, *args, **options):
+        if options['cubetas'] is not None and not 1 <= options['cubetas'] <= 200:
+            raise CommandError('--cubetas debe estar entre 1 y 200.')
+
+        tiempos = {}
+        inicio = time.perf_counter()
+        filas = refrescar_histograma(cubetas=options['cubetas'], tiempos=tiempos)
+        total = (time.perf_counter() - inicio) * 1000
+
+        for paso, ms in tiempos.items():
+            self.stdout.write(f'{paso:>18} {ms:>10.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'{len(filas)} cubetas guardadas en {total:.2f} ms'))
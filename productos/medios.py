@@ -0,0 +1,77 @@
+import os
+import posixpath
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+
+from django.core.files.storage import FileSystemStorage
+
+from productos.models import ImagenProducto, TrabajoImagen
+from productos.tareas import nombres_en_uso
+
+
+def carpetas_de_medios():
+    """Carpetas del almacenamiento donde escriben ImagenProducto y TrabajoImagen."""
+    carpetas = {
+        ImagenProducto._meta.get_field(campo).upload_to
+        for campo in ('imagen_url', 'imagen_thumb', 'imagen_medium')
+    }
+    carpetas.add(TrabajoImagen._meta.get_field('archivo').upload_to)
+    # productos/variantes/ ya se recorre dentro de productos/
+    carpetas = {carpeta.rstrip('/') for carpeta in carpetas}
+    return sorted(
+        carpeta for carpeta in carpetas
+        if not any(carpeta.startswith(otra + '/') for otra in carpetas if otra != carpeta)
+    )
+
+
+def recorrer_local(almacenamiento, carpeta):
+    """Recorre el disco con os.scandir sin listar carpetas enteras en memoria."""
+    pendientes = [carpeta]
+    while pendientes:
+        relativa = pendientes.pop()
+        try:
+            entradas = os.scandir(almacenamiento.path(relativa))
+        except FileNotFoundError:
+            continue
+        with entradas:
+            for entrada in entradas:
+                nombre = posixpath.join(relativa, entrada.name)
+                if entrada.is_dir(follow_symlinks=False):
+                    pendientes.append(nombre)
+                elif entrada.is_file(follow_symlinks=False):
+                    datos = entrada.stat()
+                    yield nombre, datos.st_size, datetime.fromtimestamp(datos.st_mtime, tz=dt_timezone.utc)
+
+
+def recorrer_remoto(almacenamiento, carpeta):
+    # La API de Storage solo ofrece listdir; tamaño y fecha se piden luego, solo para huérfanos
+    carpetas, archivos = almacenamiento.listdir(carpeta)
+    for archivo in archivos:
+        yield posixpath.join(carpeta, archivo), None, None
+    for subcarpeta in carpetas:
+        yield from recorrer_remoto(almacenamiento, posixpath.join(carpeta, subcarpeta))
+
+
+def buscar_huerfanos(almacenamiento, limite, tamano_lote):
+    """
+    Recorre las carpetas de medios por lotes y devuelve, en streaming,
+    (nombre, bytes) de los archivos que ninguna fila referencia y que no se
+    modificaron después de `limite`.
+    """
+    recorrer = recorrer_local if isinstance(almacenamiento, FileSystemStorage) else recorrer_remoto
+    for carpeta in carpetas_de_medios():
+        archivos = recorrer(almacenamiento, carpeta)
+        while True:
+            lote = list(islice(archivos, tamano_lote))
+            if not lote:
+                break
+            en_uso = nombres_en_uso(nombre for nombre, _, _ in lote)
+            for nombre, tamano, modificado in lote:
+                if nombre in en_uso:
+                    continue
+                if modificado is None:
+                    modificado = almacenamiento.get_modified_time(nombre)
+                if modificado > limite:
+                    # Puede ser una subida cuya fila aún no se ha guardado
+                    continue
+                yield nombre, almacenamiento.size(nombre) if tamano is None else tamano
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:01
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def crear_indice_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'UPDATE "PRODUCTOS" SET busqueda = '
+        "setweight(to_tsvector('spanish', COALESCE(nombre, '')), 'A') || "
+        "setweight(to_tsvector('spanish', COALESCE(descripcion, '')), 'B')"
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS productos_busqueda_gin ON "PRODUCTOS" USING gin (busqueda)'
+    )
+
+
+def eliminar_indice_busqueda(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS productos_busqueda_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0005_alter_imagenproducto_imagen_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(db_column='busqueda', editable=False, null=True, verbose_name='Vector de Búsqueda'),
+        ),
+        migrations.RunPython(crear_indice_busqueda, eliminar_indice_busqueda),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0006_producto_busqueda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['id_negocio', '-fecha_creacion', '-id_producto'], name='productos_neg_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('vendido', False)), fields=['id_negocio', '-fecha_creacion', '-id_producto'], name='productos_neg_disp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['id_negocio', 'id_categoria', '-fecha_creacion'], name='productos_neg_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['id_negocio', 'estado', '-fecha_creacion'], name='productos_neg_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['id_negocio', 'precio'], name='productos_neg_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['id_negocio', 'nombre'], name='productos_neg_nombre_idx'),
+        ),
+        migrations.AlterField(
+            model_name='producto',
+            name='id_negocio',
+            field=models.ForeignKey(db_column='id_negocio', db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='productos', to=settings.AUTH_USER_MODEL, verbose_name='ID Negocio'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0007_indices_mis_productos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoImagen',
+            fields=[
+                ('id_trabajo', models.AutoField(primary_key=True, serialize=False)),
+                ('archivo', models.FileField(blank=True, db_column='archivo', max_length=500, upload_to='pendientes/', verbose_name='Archivo Original')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('error', 'Error')], db_column='estado', default='pendiente', max_length=20, verbose_name='Estado del Trabajo')),
+                ('error', models.TextField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('id_imagen', models.ForeignKey(blank=True, db_column='id_imagen', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='productos.imagenproducto', verbose_name='Imagen Generada')),
+                ('id_producto', models.ForeignKey(db_column='id_producto', on_delete=django.db.models.deletion.CASCADE, related_name='trabajos_imagen', to='productos.producto', verbose_name='ID Producto')),
+            ],
+            options={
+                'verbose_name': 'Trabajo de Imagen',
+                'verbose_name_plural': 'Trabajos de Imagenes',
+                'db_table': 'TRABAJOS_IMAGENES',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'fecha_actualizacion'], name='trabajos_estado_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0008_trabajos_imagenes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='imagen_medium',
+            field=models.ImageField(blank=True, db_column='imagen_medium', max_length=500, null=True, upload_to='productos/variantes/', verbose_name='Imagen Mediana'),
+        ),
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='imagen_thumb',
+            field=models.ImageField(blank=True, db_column='imagen_thumb', max_length=500, null=True, upload_to='productos/variantes/', verbose_name='Miniatura'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0010_producto_version'),
+        ('usuarios', '0004_remove_usuario_usuario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenInventario',
+            fields=[
+                ('id_negocio', models.OneToOneField(db_column='id_negocio', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_inventario', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='ID Negocio')),
+                ('total_productos', models.IntegerField(db_column='total_productos', default=0)),
+                ('total_vendidos', models.IntegerField(db_column='total_vendidos', default=0)),
+                ('unidades_stock', models.BigIntegerField(db_column='unidades_stock', default=0)),
+                ('valor_inventario', models.DecimalField(db_column='valor_inventario', decimal_places=2, default=0, max_digits=16)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Inventario',
+                'verbose_name_plural': 'Resumenes de Inventario',
+                'db_table': 'RESUMENES_INVENTARIO',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0011_resumen_inventario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('vendido', False)), fields=['-fecha_creacion', '-id_producto'], name='productos_disp_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('vendido', False)), fields=['id_categoria', '-fecha_creacion', '-id_producto'], name='productos_disp_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('vendido', False)), fields=['id_categoria', 'estado', 'precio'], name='productos_disp_faceta_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0012_indices_catalogo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistogramaPrecio',
+            fields=[
+                ('id_histograma', models.AutoField(primary_key=True, serialize=False)),
+                ('cubeta', models.PositiveSmallIntegerField(db_column='cubeta')),
+                ('desde', models.DecimalField(db_column='desde', decimal_places=2, max_digits=10)),
+                ('hasta', models.DecimalField(db_column='hasta', decimal_places=2, max_digits=10)),
+                ('total', models.IntegerField(db_column='total', default=0)),
+                ('fecha_calculo', models.DateTimeField(db_column='fecha_calculo')),
+            ],
+            options={
+                'verbose_name': 'Histograma de Precios',
+                'verbose_name_plural': 'Histogramas de Precios',
+                'db_table': 'HISTOGRAMA_PRECIOS',
+                'ordering': ['id_categoria', 'cubeta'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('vendido', False)), fields=['precio', 'id_producto'], name='productos_disp_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('vendido', False)), fields=['id_categoria', 'precio', 'id_producto'], name='productos_disp_cat_precio_idx'),
+        ),
+        migrations.AddField(
+            model_name='histogramaprecio',
+            name='id_categoria',
+            field=models.ForeignKey(blank=True, db_column='id_categoria', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='histograma_precios', to='productos.categoria', verbose_name='ID Categoria'),
+        ),
+        migrations.AddIndex(
+            model_name='histogramaprecio',
+            index=models.Index(fields=['id_categoria', 'cubeta'], name='histograma_cat_idx'),
+        ),
+    ]
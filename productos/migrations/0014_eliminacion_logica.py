@@ -0,0 +1,81 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0013_histograma_precios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_neg_disp_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_disp_fecha_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_disp_cat_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_disp_faceta_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_disp_precio_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='productos_disp_cat_precio_idx',
+        ),
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, db_column='eliminado_en', editable=False, null=True, verbose_name='Fecha de Eliminación'),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, db_column='eliminado_en', editable=False, null=True, verbose_name='Fecha de Eliminación'),
+        ),
+        migrations.AddIndex(
+            model_name='imagenproducto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', False)), fields=['eliminado_en'], name='imagenes_eliminadas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', True), ('vendido', False)), fields=['id_negocio', '-fecha_creacion', '-id_producto'], name='productos_neg_disp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', True), ('vendido', False)), fields=['-fecha_creacion', '-id_producto'], name='productos_disp_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', True), ('vendido', False)), fields=['id_categoria', '-fecha_creacion', '-id_producto'], name='productos_disp_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', True), ('vendido', False)), fields=['precio', 'id_producto'], name='productos_disp_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', True), ('vendido', False)), fields=['id_categoria', 'precio', 'id_producto'], name='productos_disp_cat_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', True), ('vendido', False)), fields=['id_categoria', 'estado', 'precio'], name='productos_disp_faceta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('eliminado_en__isnull', False)), fields=['eliminado_en'], name='productos_eliminados_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('productos', '0014_eliminacion_logica'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='ancho_full',
+            field=models.PositiveIntegerField(blank=True, db_column='ancho_full', null=True, verbose_name='Ancho de la Imagen'),
+        ),
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='ancho_medium',
+            field=models.PositiveIntegerField(blank=True, db_column='ancho_medium', null=True, verbose_name='Ancho de la Imagen Mediana'),
+        ),
+        migrations.AddField(
+            model_name='imagenproducto',
+            name='ancho_thumb',
+            field=models.PositiveIntegerField(blank=True, db_column='ancho_thumb', null=True, verbose_name='Ancho de la Miniatura'),
+        ),
+    ]
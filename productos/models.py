@@ -1,11 +1,22 @@
+import re
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, SearchVectorField
+from django.db import connections, models
+from django.db.models import Case, F, FloatField, Q, Value, When
 
 ESTADOS_PRODUCTO = [
     ('Nuevo', 'Nuevo'),
     ('Usado', 'Usado'),
 ]
 
+ESTADOS_TRABAJO = [
+    ('pendiente', 'Pendiente'),
+    ('procesando', 'Procesando'),
+    ('completado', 'Completado'),
+    ('error', 'Error'),
+]
+
 def validator(value):
     if not value:
         raise ValueError("Este campo no puede estar vacío.")
@@ -27,6 +38,72 @@ class Categoria(models.Model):
         verbose_name_plural = 'Categorias'
         ordering = ['nombre']
     
+CONFIGURACION_BUSQUEDA = 'spanish'
+
+VECTOR_BUSQUEDA = (
+    SearchVector('nombre', weight='A', config=CONFIGURACION_BUSQUEDA)
+    + SearchVector('descripcion', weight='B', config=CONFIGURACION_BUSQUEDA)
+)
+
+class ProductoQuerySet(models.QuerySet):
+    def _es_postgres(self):
+        return connections[self.db].vendor == 'postgresql'
+
+    def filtrar(self, categoria=None, estado=None, vendido=None, precio_min=None, precio_max=None):
+        if categoria:
+            self = self.filter(id_categoria=categoria)
+        if estado:
+            self = self.filter(estado=estado)
+        if vendido is not None:
+            self = self.filter(vendido=vendido)
+        if precio_min is not None:
+            self = self.filter(precio__gte=precio_min)
+        if precio_max is not None:
+            self = self.filter(precio__lte=precio_max)
+        return self
+
+    def incrementar_version(self):
+        return self.update(version=F('version') + 1)
+
+    def actualizar_busqueda(self):
+        # En SQLite no existe tsvector: la búsqueda usa el respaldo con icontains
+        if not self._es_postgres():
+            return 0
+        return self.update(busqueda=VECTOR_BUSQUEDA)
+
+    def buscar(self, termino):
+        palabras = re.findall(r'\w+', termino)
+        if not palabras:
+            return self
+
+        if self._es_postgres():
+            # Prefijos (cob:*) para que la búsqueda funcione mientras se escribe
+            consulta = SearchQuery(
+                ' & '.join(f'{palabra}:*' for palabra in palabras),
+                config=CONFIGURACION_BUSQUEDA,
+                search_type='raw'
+            )
+            return self.filter(busqueda=consulta).annotate(
+                rango=SearchRank(F('busqueda'), consulta)
+            ).order_by('-rango', '-fecha_creacion')
+
+        filtro = Q()
+        for palabra in palabras:
+            filtro &= Q(nombre__icontains=palabra) | Q(descripcion__icontains=palabra)
+        return self.filter(filtro).annotate(
+            rango=Case(
+                When(nombre__icontains=palabras[0], then=Value(1.0)),
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        ).order_by('-rango', '-fecha_creacion')
+
+class SinEliminadosManager(models.Manager):
+    """Manager por defecto: oculta las filas marcadas con eliminado_en."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
+
 class Producto(models.Model):
     id_producto = models.AutoField(
         primary_key=True, 
@@ -73,6 +150,7 @@ class Producto(models.Model):
         on_delete=models.CASCADE,
         related_name='productos',
         db_column='id_negocio',
+        db_index=False,
         verbose_name='ID Negocio', 
     )
     id_categoria = models.ForeignKey(
@@ -81,6 +159,29 @@ class Producto(models.Model):
         db_column='id_categoria',
         verbose_name='ID Categoria'
     )
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        db_column='version',
+        verbose_name='Versión'
+    )
+    busqueda = SearchVectorField(
+        null=True,
+        editable=False,
+        db_column='busqueda',
+        verbose_name='Vector de Búsqueda'
+    )
+    eliminado_en = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        db_column='eliminado_en',
+        verbose_name='Fecha de Eliminación'
+    )
+
+    # `objects` no ve los eliminados; `todos` sí (purga y auditoría)
+    objects = SinEliminadosManager.from_queryset(ProductoQuerySet)()
+    todos = ProductoQuerySet.as_manager()
 
     def __str__(self):
         return self.nombre
@@ -90,6 +191,63 @@ class Producto(models.Model):
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['-fecha_creacion']
+        # Todas las consultas de mis-productos filtran por negocio; el índice simple
+        # de la FK queda cubierto por productos_neg_fecha_idx
+        indexes = [
+            models.Index(
+                fields=['id_negocio', '-fecha_creacion', '-id_producto'],
+                name='productos_neg_fecha_idx'
+            ),
+            models.Index(
+                fields=['id_negocio', '-fecha_creacion', '-id_producto'],
+                name='productos_neg_disp_idx',
+                condition=Q(vendido=False, eliminado_en__isnull=True)
+            ),
+            models.Index(
+                fields=['id_negocio', 'id_categoria', '-fecha_creacion'],
+                name='productos_neg_cat_idx'
+            ),
+            models.Index(
+                fields=['id_negocio', 'estado', '-fecha_creacion'],
+                name='productos_neg_estado_idx'
+            ),
+            models.Index(fields=['id_negocio', 'precio'], name='productos_neg_precio_idx'),
+            models.Index(fields=['id_negocio', 'nombre'], name='productos_neg_nombre_idx'),
+            # Catálogo público (todos los negocios, por defecto solo disponibles)
+            models.Index(
+                fields=['-fecha_creacion', '-id_producto'],
+                name='productos_disp_fecha_idx',
+                condition=Q(vendido=False, eliminado_en__isnull=True)
+            ),
+            models.Index(
+                fields=['id_categoria', '-fecha_creacion', '-id_producto'],
+                name='productos_disp_cat_idx',
+                condition=Q(vendido=False, eliminado_en__isnull=True)
+            ),
+            # Orden por precio del catálogo (ascendente o, recorrido al revés, descendente)
+            models.Index(
+                fields=['precio', 'id_producto'],
+                name='productos_disp_precio_idx',
+                condition=Q(vendido=False, eliminado_en__isnull=True)
+            ),
+            models.Index(
+                fields=['id_categoria', 'precio', 'id_producto'],
+                name='productos_disp_cat_precio_idx',
+                condition=Q(vendido=False, eliminado_en__isnull=True)
+            ),
+            # Cubre el GROUP BY de las facetas, también con filtro de precio
+            models.Index(
+                fields=['id_categoria', 'estado', 'precio'],
+                name='productos_disp_faceta_idx',
+                condition=Q(vendido=False, eliminado_en__isnull=True)
+            ),
+            # Cola de la purga: solo las filas marcadas
+            models.Index(
+                fields=['eliminado_en'],
+                name='productos_eliminados_idx',
+                condition=Q(eliminado_en__isnull=False)
+            ),
+        ]
 
 class ImagenProducto(models.Model):
     id_imagen = models.AutoField(primary_key=True)
@@ -108,6 +266,51 @@ class ImagenProducto(models.Model):
         verbose_name='URL de la Imagen',
         help_text='URL de Supabase Storage'
     )
+    imagen_thumb = models.ImageField(
+        upload_to='productos/variantes/',
+        max_length=500,
+        blank=True,
+        null=True,
+        db_column='imagen_thumb',
+        verbose_name='Miniatura'
+    )
+    imagen_medium = models.ImageField(
+        upload_to='productos/variantes/',
+        max_length=500,
+        blank=True,
+        null=True,
+        db_column='imagen_medium',
+        verbose_name='Imagen Mediana'
+    )
+    # Ancho real en píxeles de cada variante (para los descriptores `w` del srcset)
+    ancho_thumb = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        db_column='ancho_thumb',
+        verbose_name='Ancho de la Miniatura'
+    )
+    ancho_medium = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        db_column='ancho_medium',
+        verbose_name='Ancho de la Imagen Mediana'
+    )
+    ancho_full = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        db_column='ancho_full',
+        verbose_name='Ancho de la Imagen'
+    )
+    eliminado_en = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False,
+        db_column='eliminado_en',
+        verbose_name='Fecha de Eliminación'
+    )
+
+    objects = SinEliminadosManager()
+    todos = models.Manager()
 
     def __str__(self):
         return f"Imagen de {self.id_producto.nombre}"
@@ -116,4 +319,119 @@ class ImagenProducto(models.Model):
         db_table = 'IMAGENES_PRODUCTOS'
         verbose_name = 'Imagen Producto'
         verbose_name_plural = 'Imagenes Productos'
-        ordering = ['id_producto']
\ No newline at end of file
+        ordering = ['id_producto']
+        indexes = [
+            models.Index(
+                fields=['eliminado_en'],
+                name='imagenes_eliminadas_idx',
+                condition=Q(eliminado_en__isnull=False)
+            ),
+        ]
+
+class TrabajoImagen(models.Model):
+    id_trabajo = models.AutoField(primary_key=True)
+    id_producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='trabajos_imagen',
+        db_column='id_producto',
+        verbose_name='ID Producto'
+    )
+    archivo = models.FileField(
+        upload_to='pendientes/',
+        max_length=500,
+        blank=True,
+        db_column='archivo',
+        verbose_name='Archivo Original'
+    )
+    estado = models.CharField(
+        max_length=20, choices=ESTADOS_TRABAJO, default='pendiente',
+        db_column='estado',
+        verbose_name='Estado del Trabajo'
+    )
+    id_imagen = models.ForeignKey(
+        ImagenProducto,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        db_column='id_imagen',
+        verbose_name='Imagen Generada'
+    )
+    error = models.TextField(blank=True, null=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Trabajo {self.id_trabajo} ({self.estado})"
+
+    class Meta:
+        db_table = 'TRABAJOS_IMAGENES'
+        verbose_name = 'Trabajo de Imagen'
+        verbose_name_plural = 'Trabajos de Imagenes'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_actualizacion'], name='trabajos_estado_idx'),
+        ]
+
+
+class HistogramaPrecio(models.Model):
+    """
+    Resumen de precios de productos disponibles por categoría (id_categoria
+    nulo = todo el catálogo). Se recalcula con `refrescar_histograma`.
+    """
+    id_histograma = models.AutoField(primary_key=True)
+    id_categoria = models.ForeignKey(
+        Categoria,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='histograma_precios',
+        db_column='id_categoria',
+        verbose_name='ID Categoria'
+    )
+    cubeta = models.PositiveSmallIntegerField(db_column='cubeta')
+    desde = models.DecimalField(max_digits=10, decimal_places=2, db_column='desde')
+    hasta = models.DecimalField(max_digits=10, decimal_places=2, db_column='hasta')
+    total = models.IntegerField(default=0, db_column='total')
+    fecha_calculo = models.DateTimeField(db_column='fecha_calculo')
+
+    def __str__(self):
+        return f"{self.desde} - {self.hasta}: {self.total}"
+
+    class Meta:
+        db_table = 'HISTOGRAMA_PRECIOS'
+        verbose_name = 'Histograma de Precios'
+        verbose_name_plural = 'Histogramas de Precios'
+        ordering = ['id_categoria', 'cubeta']
+        indexes = [
+            models.Index(fields=['id_categoria', 'cubeta'], name='histograma_cat_idx'),
+        ]
+
+class ResumenInventario(models.Model):
+    id_negocio = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resumen_inventario',
+        db_column='id_negocio',
+        verbose_name='ID Negocio'
+    )
+    total_productos = models.IntegerField(default=0, db_column='total_productos')
+    total_vendidos = models.IntegerField(default=0, db_column='total_vendidos')
+    unidades_stock = models.BigIntegerField(default=0, db_column='unidades_stock')
+    valor_inventario = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        db_column='valor_inventario'
+    )
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Inventario de {self.id_negocio_id}"
+
+    class Meta:
+        db_table = 'RESUMENES_INVENTARIO'
+        verbose_name = 'Resumen de Inventario'
+        verbose_name_plural = 'Resumenes de Inventario'
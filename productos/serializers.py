@@ -1,27 +1,90 @@
+from collections import defaultdict
+
 from rest_framework import serializers
-from productos.models import Categoria, Producto, ImagenProducto
+from productos.imagenes import CAMPOS_ANCHO, CAMPOS_VARIANTES, armar_srcset
+from productos.inventario import aplicar_delta, contribucion, diferencia
+from productos.models import (
+    Categoria,
+    HistogramaPrecio,
+    ImagenProducto,
+    Producto,
+    ResumenInventario,
+    TrabajoImagen
+)
+from scrap_backend.campos import CamposDinamicosMixin
+from scrap_backend.cambios import aplicar_cambios
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
+
+def agregar_imagenes(producto, urls, existentes=()):
+    """Crea en un solo INSERT las imágenes que aún no tenga el producto."""
+    nuevas = [url for url in dict.fromkeys(urls) if url not in existentes]
+    return ImagenProducto.objects.bulk_create([
+        ImagenProducto(id_producto=producto, imagen_url=url) for url in nuevas
+    ])
+
 class CategoriaSerializer(serializers.ModelSerializer):    
     class Meta:
         model = Categoria
         fields = ['id_categoria', 'nombre', 'descripcion']
         read_only_fields = ['id_categoria']
 
+def url_absoluta(request, archivo):
+    if request and archivo:
+        return request.build_absolute_uri(archivo.url)
+    return None
+
 class ImagenProductoSerializer(serializers.ModelSerializer):
     imagen_url = serializers.SerializerMethodField()
+    variantes = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ImagenProducto
-        fields = ['id_imagen', 'imagen_url', 'id_producto']
+        fields = ['id_imagen', 'imagen_url', 'variantes', 'srcset', 'id_producto']
 
     def get_imagen_url(self, obj):
+        return url_absoluta(self.context.get('request'), obj.imagen_url)
+
+    def get_variantes(self, obj):
+        # Las imágenes anteriores a las variantes solo tienen el original
+        request = self.context.get('request')
+        completa = url_absoluta(request, obj.imagen_url)
+        return {
+            variante: url_absoluta(request, getattr(obj, campo)) or completa
+            for variante, campo in CAMPOS_VARIANTES.items()
+        }
+
+    def get_srcset(self, obj):
         request = self.context.get('request')
-        if request and obj.imagen_url:
-            return request.build_absolute_uri(obj.imagen_url.url)
-        return None
+        completa = url_absoluta(request, obj.imagen_url)
+        if not obj.imagen_thumb:
+            return completa
+        return armar_srcset(
+            (url_absoluta(request, getattr(obj, campo)), getattr(obj, CAMPOS_ANCHO[variante]))
+            for variante, campo in CAMPOS_VARIANTES.items()
+        ) or completa
+
+class TrabajoImagenSerializer(serializers.ModelSerializer):
+    imagen = ImagenProductoSerializer(source='id_imagen', read_only=True)
+
+    class Meta:
+        model = TrabajoImagen
+        fields = [
+            'id_trabajo',
+            'id_producto',
+            'estado',
+            'error',
+            'imagen',
+            'fecha_creacion',
+            'fecha_actualizacion'
+        ]
+        read_only_fields = fields
 
-class ProductoSerializer(serializers.ModelSerializer):
+class ProductoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     categoria_nombre = serializers.CharField(
         source='id_categoria.nombre',
         read_only=True
@@ -32,6 +95,7 @@ class ProductoSerializer(serializers.ModelSerializer):
     )
 
     imagenes = ImagenProductoSerializer(many=True, read_only=True)
+    miniatura = serializers.SerializerMethodField()
 
     
     class Meta:
@@ -47,9 +111,20 @@ class ProductoSerializer(serializers.ModelSerializer):
             'categoria_nombre',
             'negocio_nombre',
             'fecha_creacion',
-            'imagenes'
+            'imagenes',
+            'miniatura'
         ]
         read_only_fields = ['id_producto', 'fecha_creacion']
+        # Solo con ?expand=miniatura o ?fields=...,miniatura
+        campos_expandibles = ['miniatura']
+        fuentes = {'miniatura': 'imagenes'}
+
+    def get_miniatura(self, obj):
+        # Primera imagen por id_imagen, el mismo orden que IMAGENES_PREFETCH
+        imagenes = sorted(obj.imagenes.all(), key=lambda imagen: imagen.id_imagen)
+        if not imagenes:
+            return None
+        return url_absoluta(self.context.get('request'), imagenes[0].imagen_thumb or imagenes[0].imagen_url)
 
 class ProductoDetailSerializer(ProductoSerializer):
     categoria = CategoriaSerializer(source='id_categoria', read_only=True)
@@ -57,11 +132,9 @@ class ProductoDetailSerializer(ProductoSerializer):
     
     class Meta(ProductoSerializer.Meta):
         fields = ProductoSerializer.Meta.fields + [
-            'descripcion',
             'categoria',
-            'imagenes',
             'fecha_vendido',
-            'imagen'  
+            'version'
         ]
 
 class ProductoCreateSerializer(serializers.ModelSerializer):
@@ -95,21 +168,37 @@ class ProductoCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La cantidad debe ser mayor o igual a 0.")
         return value
     
+    @transaction.atomic
     def create(self, validated_data):
         imagenes_urls = validated_data.pop('imagenes_urls', [])
         
         validated_data['id_negocio'] = self.context['request'].user
         
         producto = Producto.objects.create(**validated_data)
+        Producto.objects.filter(pk=producto.pk).actualizar_busqueda()
+        aplicar_delta(producto.id_negocio_id, contribucion(producto))
         
-        for url in imagenes_urls:
-            ImagenProducto.objects.create(
-                id_producto=producto,
-                imagen_url=url
-            )
+        agregar_imagenes(producto, imagenes_urls)
         
         return producto
 
+class CategoriaEnMemoriaField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que carga las categorías una sola vez, para no
+    hacer un SELECT por fila al validar importaciones grandes.
+    """
+
+    def to_internal_value(self, data):
+        if not hasattr(self, '_categorias'):
+            self._categorias = {str(categoria.pk): categoria for categoria in self.get_queryset()}
+        try:
+            return self._categorias[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+class ProductoImportSerializer(ProductoCreateSerializer):
+    id_categoria = CategoriaEnMemoriaField(queryset=Categoria.objects.all())
+
 class ProductoUpdateSerializer(serializers.ModelSerializer):
     imagenes_urls = serializers.ListField(
         child=serializers.URLField(max_length=500),
@@ -143,23 +232,186 @@ class ProductoUpdateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("La cantidad debe ser mayor o igual a 0.")
         return value
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         vendido = validated_data.pop('vendido', None)
+        imagenes_urls = validated_data.pop('imagenes_urls', [])
+        # Bloquea la fila y relee lo que cuenta en el resumen: si no, una venta
+        # concurrente entraría dos veces en la diferencia
+        instance.refresh_from_db(
+            fields=['precio', 'cantidad', 'vendido'],
+            from_queryset=Producto.objects.select_for_update()
+        )
+        antes = contribucion(instance)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+        cambiados = aplicar_cambios(instance, validated_data)
 
         if vendido is not None:
             if vendido:
                 instance.vendido = True
                 instance.fecha_vendido = timezone.now()
-                instance.cantidad = instance.cantidad - 1 if instance.cantidad > 0 else 0
+                if 'cantidad' in validated_data:
+                    instance.cantidad = max(validated_data['cantidad'] - 1, 0)
+                else:
+                    # Descuento en la BD: dos ventas simultáneas no se pisan
+                    instance.cantidad = Greatest(F('cantidad') - 1, 0)
+                cambiados += ['vendido', 'fecha_vendido', 'cantidad']
             else:
-                instance.vendido = False
-                instance.fecha_vendido = None
+                cambiados += aplicar_cambios(instance, {'vendido': False, 'fecha_vendido': None})
+
+        nuevas = []
+        if imagenes_urls:
+            existentes = set(
+                instance.imagenes.filter(imagen_url__in=imagenes_urls).values_list('imagen_url', flat=True)
+            )
+            nuevas = agregar_imagenes(instance, imagenes_urls, existentes)
 
-        instance.save()
+        if not cambiados and not nuevas:
+            return instance
+
+        # Solo se escriben las columnas modificadas (y la versión para el ETag)
+        instance.version = F('version') + 1
+        instance.save(update_fields=list(dict.fromkeys(cambiados)) + ['version'])
+        instance.refresh_from_db(fields=['version', 'cantidad'])
+        aplicar_delta(instance.id_negocio_id, diferencia(antes, contribucion(instance)))
+
+        if 'nombre' in cambiados or 'descripcion' in cambiados:
+            Producto.objects.filter(pk=instance.pk).actualizar_busqueda()
 
         return instance
 
+class ResumenInventarioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ResumenInventario
+        fields = [
+            'id_negocio',
+            'total_productos',
+            'total_vendidos',
+            'unidades_stock',
+            'valor_inventario',
+            'fecha_actualizacion'
+        ]
+        read_only_fields = fields
+
+class HistogramaPrecioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HistogramaPrecio
+        fields = ['desde', 'hasta', 'total']
+        read_only_fields = fields
+
+class HistogramaSerializer(serializers.Serializer):
+    categoria = serializers.IntegerField(allow_null=True)
+    fecha_calculo = serializers.DateTimeField(allow_null=True)
+    cubetas = HistogramaPrecioSerializer(many=True)
+
+class EliminarLoteSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=1000
+    )
+
+class VentaSerializer(serializers.Serializer):
+    id_producto = serializers.IntegerField()
+    cantidad = serializers.IntegerField(min_value=1, default=1)
+
+class ProductoVendidoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Producto
+        fields = ['id_producto', 'cantidad', 'vendido', 'fecha_vendido', 'version']
+        read_only_fields = fields
+
+class ProductoListaRapidaSerializer:
+    """
+    Versión de solo lectura de ProductoSerializer(many=True) para listados.
+
+    Trabaja sobre filas de .values() (ver `consulta`) y arma los dicts a mano,
+    sin instanciar modelos ni recorrer campos DRF por cada fila; las imágenes
+    de toda la página se leen en una consulta. Precio y fecha usan los mismos
+    campos DRF que ProductoSerializer para que el JSON sea idéntico.
+    """
+    columnas = (
+        'id_producto',
+        'nombre',
+        'descripcion',
+        'precio',
+        'cantidad',
+        'estado',
+        'vendido',
+        'id_categoria__nombre',
+        'id_negocio__nombre_negocio',
+        'fecha_creacion',
+    )
+    columnas_imagen = (
+        'id_imagen', 'id_producto', 'imagen_url', 'imagen_thumb', 'imagen_medium',
+        'ancho_full', 'ancho_thumb', 'ancho_medium'
+    )
+
+    def __init__(self, instance=None, many=True, context=None):
+        self.instance = instance
+        self.context = context or {}
+
+    @classmethod
+    def consulta(cls, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*cls.columnas)
+
+    @property
+    def data(self):
+        filas = list(self.instance)
+        request = self.context.get('request')
+        campos = ProductoSerializer().fields
+        precio = campos['precio'].to_representation
+        fecha = campos['fecha_creacion'].to_representation
+
+        imagenes = defaultdict(list)
+        if filas:
+            consulta = ImagenProducto.objects.filter(
+                id_producto__in=[fila['id_producto'] for fila in filas]
+            ).order_by('id_imagen').values_list(*self.columnas_imagen)
+            for imagen in consulta:
+                imagenes[imagen[1]].append(self.imagen(request, imagen))
+
+        return [
+            {
+                'id_producto': fila['id_producto'],
+                'nombre': fila['nombre'],
+                'descripcion': fila['descripcion'],
+                'precio': precio(fila['precio']),
+                'cantidad': fila['cantidad'],
+                'estado': fila['estado'],
+                'vendido': fila['vendido'],
+                'categoria_nombre': fila['id_categoria__nombre'],
+                'negocio_nombre': fila['id_negocio__nombre_negocio'],
+                'fecha_creacion': fecha(fila['fecha_creacion']),
+                'imagenes': imagenes[fila['id_producto']],
+            }
+            for fila in filas
+        ]
 
+    @staticmethod
+    def imagen(request, fila):
+        id_imagen, id_producto, *columnas = fila
+        nombres = dict(zip(('imagen_url', 'imagen_thumb', 'imagen_medium'), columnas[:3]))
+        anchos = dict(zip(('full', 'thumb', 'medium'), columnas[3:]))
+        urls = {
+            campo: request.build_absolute_uri(ImagenProducto._meta.get_field(campo).storage.url(nombre))
+            if request and nombre else None
+            for campo, nombre in nombres.items()
+        }
+        completa = urls['imagen_url']
+        if not nombres['imagen_thumb']:
+            srcset = completa
+        else:
+            srcset = armar_srcset(
+                (urls[campo], anchos[variante]) for variante, campo in CAMPOS_VARIANTES.items()
+            ) or completa
+        return {
+            'id_imagen': id_imagen,
+            'imagen_url': completa,
+            'variantes': {
+                variante: urls[campo] or completa
+                for variante, campo in CAMPOS_VARIANTES.items()
+            },
+            'srcset': srcset,
+            'id_producto': id_producto,
+        }
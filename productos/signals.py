@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from productos.cache import invalidar_categorias
+from productos.models import Categoria
+
+
+@receiver([post_save, post_delete], sender=Categoria)
+def categoria_modificada(sender, **kwargs):
+    invalidar_categorias()
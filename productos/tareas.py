@@ -0,0 +1,196 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from productos.imagenes import CAMPOS_ANCHO, CAMPOS_VARIANTES, generar_variantes
+from productos.models import ImagenProducto, Producto, TrabajoImagen
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_purga = {'activa': False, 'pendiente': False}
+_purga_lock = threading.Lock()
+
+CAMPOS_ARCHIVO = ('imagen_url', 'imagen_thumb', 'imagen_medium')
+
+
+def obtener_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGENES_TRABAJADORES,
+                thread_name_prefix='imagenes'
+            )
+    return _executor
+
+
+def encolar_trabajo(id_trabajo):
+    """Envía el trabajo al pool local cuando la transacción actual se confirma."""
+    transaction.on_commit(lambda: obtener_executor().submit(ejecutar_en_hilo, id_trabajo))
+
+
+def ejecutar_en_hilo(id_trabajo):
+    close_old_connections()
+    try:
+        procesar_trabajo(id_trabajo)
+    except Exception:
+        logger.exception('Error inesperado procesando el trabajo de imagen %s', id_trabajo)
+    finally:
+        close_old_connections()
+
+
+def procesar_trabajo(id_trabajo):
+    # El UPDATE condicional evita que dos trabajadores tomen el mismo trabajo
+    tomado = TrabajoImagen.objects.filter(
+        pk=id_trabajo, estado='pendiente'
+    ).update(estado='procesando', fecha_actualizacion=timezone.now())
+    if not tomado:
+        return None
+
+    trabajo = TrabajoImagen.objects.get(pk=id_trabajo)
+    try:
+        with trabajo.archivo.open('rb') as archivo:
+            variantes = generar_variantes(archivo)
+
+        imagen = ImagenProducto(id_producto_id=trabajo.id_producto_id)
+        for variante, (contenido, ancho) in variantes.items():
+            getattr(imagen, CAMPOS_VARIANTES[variante]).save(contenido.name, contenido, save=False)
+            setattr(imagen, CAMPOS_ANCHO[variante], ancho)
+        with transaction.atomic():
+            imagen.save()
+            Producto.objects.filter(pk=trabajo.id_producto_id).incrementar_version()
+    except Exception as exc:
+        logger.exception('No se pudo procesar el trabajo de imagen %s', id_trabajo)
+        trabajo.estado = 'error'
+        trabajo.error = str(exc)
+        trabajo.save(update_fields=['estado', 'error', 'fecha_actualizacion'])
+        return trabajo
+
+    trabajo.archivo.delete(save=False)
+    trabajo.estado = 'completado'
+    trabajo.id_imagen = imagen
+    trabajo.save(update_fields=['archivo', 'estado', 'id_imagen', 'fecha_actualizacion'])
+    return trabajo
+
+
+def encolar_purga():
+    """Lanza la purga en el pool local al confirmar la transacción (si no hay retención)."""
+    if settings.PURGA_RETENCION_MINUTOS:
+        return
+    transaction.on_commit(lambda: obtener_executor().submit(purgar_en_hilo))
+
+
+def purgar_en_hilo():
+    # Una sola purga a la vez; si llegan más mientras corre, repite una vuelta al terminar
+    with _purga_lock:
+        if _purga['activa']:
+            _purga['pendiente'] = True
+            return
+        _purga['activa'] = True
+
+    close_old_connections()
+    try:
+        while True:
+            try:
+                purgar_eliminados()
+            except Exception:
+                logger.exception('Error purgando productos e imágenes eliminados')
+            with _purga_lock:
+                if not _purga['pendiente']:
+                    _purga['activa'] = False
+                    return
+                _purga['pendiente'] = False
+    finally:
+        close_old_connections()
+
+
+def nombres_en_uso(nombres):
+    """
+    De `nombres`, los que aún referencia alguna imagen (incluidas las
+    eliminadas sin purgar) o algún trabajo de imagen pendiente.
+    """
+    nombres = set(nombres)
+    if not nombres:
+        return set()
+    referencias = Q()
+    for campo in CAMPOS_ARCHIVO:
+        referencias |= Q(**{f'{campo}__in': nombres})
+    en_uso = set()
+    for fila in ImagenProducto.todos.filter(referencias).values_list(*CAMPOS_ARCHIVO):
+        en_uso.update(fila)
+    en_uso.update(TrabajoImagen.objects.filter(archivo__in=nombres).values_list('archivo', flat=True))
+    return en_uso & nombres
+
+
+def borrar_archivos(nombres):
+    """Borra del almacenamiento los archivos que ya no usa ninguna imagen."""
+    nombres = {nombre for nombre in nombres if nombre}
+    if not nombres:
+        return 0
+    en_uso = nombres_en_uso(nombres)
+
+    almacenamiento = ImagenProducto._meta.get_field('imagen_url').storage
+    borrados = 0
+    for nombre in nombres - en_uso:
+        try:
+            almacenamiento.delete(nombre)
+            borrados += 1
+        except Exception:
+            logger.warning('No se pudo borrar el archivo %s', nombre, exc_info=True)
+    return borrados
+
+
+def purgar_eliminados(tamano_lote=None, retencion_minutos=None):
+    """
+    Borra físicamente, por lotes, las imágenes y productos marcados como
+    eliminados hace más de la retención, y después sus archivos. Cada lote
+    es una transacción corta. Devuelve (productos, imágenes, archivos).
+    """
+    tamano_lote = tamano_lote or settings.PURGA_TAMANO_LOTE
+    if retencion_minutos is None:
+        retencion_minutos = settings.PURGA_RETENCION_MINUTOS
+    limite = timezone.now() - timedelta(minutes=retencion_minutos)
+    productos = imagenes = archivos = 0
+
+    # Imágenes eliminadas sueltas (su producto sigue activo)
+    while True:
+        filas = list(
+            ImagenProducto.todos.filter(eliminado_en__lte=limite)
+            .order_by('id_imagen').values_list('id_imagen', *CAMPOS_ARCHIVO)[:tamano_lote]
+        )
+        if not filas:
+            break
+        with transaction.atomic():
+            ImagenProducto.todos.filter(pk__in=[fila[0] for fila in filas]).delete()
+        imagenes += len(filas)
+        archivos += borrar_archivos(nombre for fila in filas for nombre in fila[1:])
+
+    while True:
+        ids = list(
+            Producto.todos.filter(eliminado_en__lte=limite)
+            .order_by('id_producto').values_list('id_producto', flat=True)[:tamano_lote]
+        )
+        if not ids:
+            break
+        nombres = [
+            nombre
+            for fila in ImagenProducto.todos.filter(id_producto__in=ids).values_list(*CAMPOS_ARCHIVO)
+            for nombre in fila
+        ]
+        nombres += TrabajoImagen.objects.filter(id_producto__in=ids).values_list('archivo', flat=True)
+        with transaction.atomic():
+            _, borrados = Producto.todos.filter(pk__in=ids).delete()
+        productos += len(ids)
+        imagenes += borrados.get(ImagenProducto._meta.label, 0)
+        archivos += borrar_archivos(nombres)
+
+    return productos, imagenes, archivos
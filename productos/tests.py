@@ -0,0 +1,1025 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+
+from decimal import Decimal
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+
+from productos import views_async
+from productos.cache import etag_producto
+from productos.eliminacion import eliminar_imagenes, eliminar_productos
+from productos.histograma import refrescar_histograma
+from productos.inventario import AGREGADOS
+from productos.models import (
+    Categoria, HistogramaPrecio, ImagenProducto, Producto, ResumenInventario, TrabajoImagen
+)
+from productos.serializers import ImagenProductoSerializer, ProductoListaRapidaSerializer
+from productos.tareas import procesar_trabajo, purgar_eliminados
+from usuarios.models import Usuario
+
+
+def archivo_imagen(ancho, alto, nombre='foto.png'):
+    buffer = BytesIO()
+    Image.new('RGB', (ancho, alto), 'gray').save(buffer, format='PNG')
+    return SimpleUploadedFile(nombre, buffer.getvalue(), content_type='image/png')
+
+
+def crear_productos(negocio, categoria, cantidad, imagenes=2):
+    productos = Producto.objects.bulk_create([
+        Producto(
+            nombre=f'Producto {i}',
+            descripcion='Chatarra',
+            precio=10 + i,
+            cantidad=3,
+            estado='Usado',
+            id_categoria=categoria,
+            id_negocio=negocio
+        )
+        for i in range(cantidad)
+    ])
+    ImagenProducto.objects.bulk_create([
+        ImagenProducto(id_producto=producto, imagen_url=f'https://img.test/{producto.pk}/{j}.jpg')
+        for producto in productos
+        for j in range(imagenes)
+    ])
+    return productos
+
+
+class ConsultasListadosTests(TestCase):
+    """Los listados cargan negocio, categoría e imágenes en un número fijo de consultas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+
+    def assertConsultasFijas(self, url, esperadas):
+        # La misma cantidad con una página parcial y con una página llena
+        crear_productos(self.negocio, self.categoria, 2)
+        with self.assertNumQueries(esperadas):
+            self.client.get(url)
+        crear_productos(self.negocio, self.categoria, 15)
+        cache.clear()
+        with self.assertNumQueries(esperadas):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_mis_productos(self):
+        # COUNT, productos con negocio y categoría, imágenes
+        self.assertConsultasFijas(reverse('productos:mis-productos'), 3)
+
+    def test_mis_productos_cursor(self):
+        self.assertConsultasFijas(reverse('productos:mis-productos') + '?paginacion=cursor', 2)
+
+    @override_settings(SERIALIZADOR_RAPIDO_PRODUCTOS=True)
+    def test_mis_productos_serializador_rapido(self):
+        self.assertConsultasFijas(reverse('productos:mis-productos'), 3)
+
+    def test_mis_productos_campos(self):
+        # Sin imágenes en `fields` no se hace el prefetch
+        self.assertConsultasFijas(reverse('productos:mis-productos') + '?fields=id_producto,nombre', 2)
+
+    def test_catalogo(self):
+        # Productos, imágenes y el GROUP BY de las facetas
+        self.assertConsultasFijas(reverse('productos:catalogo'), 3)
+
+
+def columnas_actualizadas(consultas, tabla):
+    """Columnas (ordenadas) del SET de cada UPDATE sobre `tabla`."""
+    return [
+        sorted(re.findall(r'"(\w+)" = ', sql.split(' WHERE ')[0]))
+        for sql in (consulta['sql'] for consulta in consultas)
+        if sql.startswith(f'UPDATE "{tabla}" SET')
+    ]
+
+
+class EscriturasParcialesTests(TestCase):
+    """Las actualizaciones escriben solo las columnas que cambian."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.producto = crear_productos(self.negocio, self.categoria, 1, imagenes=0)[0]
+
+    def editar(self, datos):
+        url = reverse('productos:producto-update', args=[self.producto.pk])
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.patch(url, datos, format='json')
+        self.assertEqual(response.status_code, 200)
+        return columnas_actualizadas(consultas, 'PRODUCTOS')
+
+    def test_producto_solo_columnas_modificadas(self):
+        self.assertEqual(self.editar({'nombre': 'Cobre'}), [['nombre', 'version']])
+
+    def test_producto_sin_cambios_no_escribe(self):
+        self.assertEqual(self.editar({'nombre': self.producto.nombre, 'precio': '10.00'}), [])
+
+    def test_producto_vendido(self):
+        self.assertEqual(
+            self.editar({'vendido': True}),
+            [['cantidad', 'fecha_vendido', 'vendido', 'version']]
+        )
+
+
+class PaginacionCursorTests(TestCase):
+    """El cursor no se combina con búsqueda ni con otro orden."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+        crear_productos(cls.negocio, cls.categoria, 3, imagenes=0)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.url = reverse('productos:mis-productos') + '?paginacion=cursor'
+
+    def test_rechaza_otro_orden(self):
+        response = self.client.get(self.url + '&ordering=precio')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+
+    def test_rechaza_busqueda(self):
+        response = self.client.get(self.url + '&search=Producto')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('search', response.data)
+
+    def test_admite_orden_del_cursor(self):
+        response = self.client.get(self.url + '&ordering=-fecha_creacion')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class ExportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+        cls.productos = crear_productos(cls.negocio, cls.categoria, 3, imagenes=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+
+    def exportar(self, consulta=''):
+        return self.client.get(reverse('productos:producto-export') + consulta)
+
+    def test_jsonl(self):
+        Producto.objects.filter(pk=self.productos[0].pk).update(vendido=True)
+        response = self.exportar('?formato=jsonl')
+        self.assertEqual(response.status_code, 200)
+        filas = [json.loads(linea) for linea in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([fila['id_producto'] for fila in filas], [producto.pk for producto in self.productos])
+        self.assertEqual(filas[0]['vendido'], True)
+        self.assertEqual(len(filas[0]['imagenes_urls']), 1)
+
+    def test_filtros(self):
+        response = self.exportar(f'?formato=jsonl&precio_min=11&categoria={self.categoria.pk}')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 2)
+
+    def test_filtro_invalido(self):
+        for consulta in ('?categoria=abc', '?vendido=quizas', '?precio_max=NaN'):
+            response = self.exportar(consulta)
+            self.assertEqual(response.status_code, 400, consulta)
+
+
+class ImagenesTests(TestCase):
+    """Las variantes se generan sin agrandar y el srcset usa su ancho real."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.producto = crear_productos(self.negocio, self.categoria, 1, imagenes=0)[0]
+        self.request = APIRequestFactory().get('/')
+
+    def procesar(self, ancho, alto):
+        trabajo = TrabajoImagen.objects.create(id_producto=self.producto, archivo=archivo_imagen(ancho, alto))
+        trabajo = procesar_trabajo(trabajo.pk)
+        self.assertEqual(trabajo.estado, 'completado', trabajo.error)
+        return ImagenProducto.objects.get(pk=trabajo.id_imagen_id)
+
+    def anchos_srcset(self, srcset):
+        return [candidato.rsplit(' ', 1)[1] for candidato in srcset.split(', ')]
+
+    def test_anchos_reales(self):
+        imagen = self.procesar(800, 400)
+        self.assertEqual((imagen.ancho_thumb, imagen.ancho_medium, imagen.ancho_full), (200, 600, 800))
+        srcset = ImagenProductoSerializer(imagen, context={'request': self.request}).data['srcset']
+        self.assertEqual(self.anchos_srcset(srcset), ['200w', '600w', '800w'])
+
+    def test_vertical_y_pequena(self):
+        imagen = self.procesar(300, 900)
+        self.assertEqual((imagen.ancho_thumb, imagen.ancho_medium, imagen.ancho_full), (67, 200, 300))
+        imagen = self.procesar(150, 100)
+        srcset = ImagenProductoSerializer(imagen, context={'request': self.request}).data['srcset']
+        # Las tres variantes miden 150: un solo candidato
+        self.assertEqual(self.anchos_srcset(srcset), ['150w'])
+
+    def test_serializador_rapido_igual(self):
+        imagen = self.procesar(800, 400)
+        filas = ProductoListaRapidaSerializer.consulta(Producto.objects.filter(pk=self.producto.pk))
+        rapido = ProductoListaRapidaSerializer(filas, context={'request': self.request}).data
+        self.assertEqual(
+            rapido[0]['imagenes'][0]['srcset'],
+            ImagenProductoSerializer(imagen, context={'request': self.request}).data['srcset']
+        )
+
+
+class TrabajosImagenTests(TestCase):
+    """La subida responde 202 y el trabajo genera las variantes en segundo plano."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.otro = Usuario.objects.create_user('Otro', 'otro@test.com', 'clave', '3000000002', 'Calle 2')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.producto = crear_productos(self.negocio, self.categoria, 1, imagenes=0)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+
+    def subir(self, archivo, id_producto=None):
+        datos = {'id_producto': self.producto.pk if id_producto is None else id_producto, 'imagen_url': archivo}
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('productos:imagen-create'), datos, format='multipart')
+        return response, callbacks
+
+    def test_subida_encola_trabajo(self):
+        response, callbacks = self.subir(archivo_imagen(800, 400))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['estado'], 'pendiente')
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(response.data['url_estado'].endswith(
+            reverse('productos:imagen-trabajo', args=[response.data['id_trabajo']])
+        ))
+        self.assertFalse(ImagenProducto.objects.filter(id_producto=self.producto).exists())
+
+    def test_subida_invalida(self):
+        response, callbacks = self.subir(SimpleUploadedFile('foto.png', b'no es imagen'))
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.subir(archivo_imagen(10, 10), id_producto='abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(TrabajoImagen.objects.exists())
+
+    def test_producto_ajeno(self):
+        self.client.force_authenticate(self.otro)
+        response, _ = self.subir(archivo_imagen(10, 10))
+        self.assertEqual(response.status_code, 404)
+
+    def test_procesar_completa_trabajo(self):
+        response, _ = self.subir(archivo_imagen(800, 400))
+        trabajo = TrabajoImagen.objects.get(pk=response.data['id_trabajo'])
+        pendiente = trabajo.archivo.path
+
+        trabajo = procesar_trabajo(trabajo.pk)
+        self.assertEqual(trabajo.estado, 'completado')
+        self.assertFalse(trabajo.archivo)
+        self.assertFalse(os.path.exists(pendiente))
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.version, 2)
+        # Un segundo trabajador no vuelve a tomarlo
+        self.assertIsNone(procesar_trabajo(trabajo.pk))
+
+        response = self.client.get(response.data['url_estado'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['estado'], 'completado')
+        imagen = response.data['imagen']
+        self.assertEqual(set(imagen['variantes']), {'thumb', 'medium', 'full'})
+        self.assertEqual(len(set(imagen['variantes'].values())), 3)
+
+    def test_archivo_corrupto(self):
+        trabajo = TrabajoImagen.objects.create(
+            id_producto=self.producto, archivo=SimpleUploadedFile('foto.png', b'no es imagen')
+        )
+        with self.assertLogs('productos.tareas', 'ERROR'):
+            trabajo = procesar_trabajo(trabajo.pk)
+        self.assertEqual(trabajo.estado, 'error')
+        self.assertTrue(trabajo.error)
+        self.assertFalse(ImagenProducto.objects.filter(id_producto=self.producto).exists())
+
+
+class HistogramaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def con_precios(self, *precios):
+        for producto, precio in zip(crear_productos(self.negocio, self.categoria, len(precios), imagenes=0), precios):
+            Producto.objects.filter(pk=producto.pk).update(precio=Decimal(precio))
+        refrescar_histograma(cubetas=20)
+        return list(HistogramaPrecio.objects.filter(id_categoria__isnull=True).order_by('cubeta'))
+
+    def assertCubetasValidas(self, cubetas, minimo, maximo, total):
+        self.assertEqual(cubetas[0].desde, Decimal(minimo))
+        self.assertEqual(cubetas[-1].hasta, Decimal(maximo))
+        for anterior, siguiente in zip(cubetas, cubetas[1:]):
+            self.assertEqual(anterior.hasta, siguiente.desde)
+        self.assertTrue(all(cubeta.desde <= cubeta.hasta for cubeta in cubetas))
+        self.assertEqual(sum(cubeta.total for cubeta in cubetas), total)
+
+    def test_rango_estrecho(self):
+        cubetas = self.con_precios('0.01', '0.02', '0.03', '0.04', '0.05')
+        self.assertEqual(len(cubetas), 4)
+        self.assertCubetasValidas(cubetas, '0.01', '0.05', 5)
+
+    def test_ancho_redondeado(self):
+        # 0.30 / 20 = 0.015: redondeado hacia arriba la última cubeta empezaría en 0.38
+        cubetas = self.con_precios('1.00', '1.30')
+        self.assertEqual(len(cubetas), 20)
+        self.assertCubetasValidas(cubetas, '1.00', '1.30', 2)
+
+    def test_precios_iguales(self):
+        cubetas = self.con_precios('7.50', '7.50')
+        self.assertEqual([(c.desde, c.hasta, c.total) for c in cubetas], [(Decimal('7.50'), Decimal('7.50'), 2)])
+
+
+class LecturaAsyncTests(TestCase):
+    """Las vistas async responden los errores igual que las vistas DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.token = Token.objects.create(user=cls.negocio)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def comparar(self, vista_async, ruta, credenciales=True, **kwargs):
+        cabeceras = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'} if credenciales else {}
+        self.client.credentials(**cabeceras)
+        sincrona = self.client.get(ruta)
+        asincrona = async_to_sync(vista_async)(APIRequestFactory().get(ruta, **cabeceras), **kwargs)
+        self.assertEqual(asincrona.status_code, sincrona.status_code)
+        self.assertEqual(json.loads(asincrona.content), sincrona.json())
+        self.assertEqual(asincrona.get('WWW-Authenticate'), sincrona.get('WWW-Authenticate'))
+        return sincrona
+
+    def test_validacion(self):
+        ruta = reverse('productos:mis-productos') + '?paginacion=cursor&ordering=precio'
+        self.assertEqual(self.comparar(views_async.mis_productos, ruta).status_code, 400)
+
+    def test_sin_autenticar(self):
+        ruta = reverse('productos:mis-productos')
+        self.assertEqual(self.comparar(views_async.mis_productos, ruta, credenciales=False).status_code, 401)
+
+    def test_no_encontrado(self):
+        ruta = reverse('productos:producto-detail', args=[999])
+        self.assertEqual(self.comparar(views_async.producto_detalle, ruta, id_producto=999).status_code, 404)
+
+
+class ImportacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.url = reverse('productos:producto-import')
+
+    def fila(self, numero, **extra):
+        return {
+            'nombre': f'Lote {numero}',
+            'descripcion': 'Chatarra',
+            'precio': '12.50',
+            'cantidad': 2,
+            'estado': 'Usado',
+            'id_categoria': self.categoria.pk,
+            **extra
+        }
+
+    def test_arreglo_json_en_lotes(self):
+        filas = [self.fila(i, imagenes_urls=[f'https://img.test/{i}.jpg']) for i in range(5)]
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url + '?lote=2', filas, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creados'], 5)
+        self.assertEqual(Producto.objects.filter(id_negocio=self.negocio).count(), 5)
+        self.assertEqual(ImagenProducto.objects.filter(id_producto__id_negocio=self.negocio).count(), 5)
+        inserciones = [c['sql'] for c in consultas if c['sql'].startswith('INSERT INTO "PRODUCTOS"')]
+        self.assertEqual(len(inserciones), 3)
+
+    def test_errores_por_fila_sin_guardar_nada(self):
+        filas = [self.fila(1), self.fila(2, precio='-5'), self.fila(3), self.fila(4, cantidad=-1)]
+        response = self.client.post(self.url, filas, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['fila'] for error in response.data['details']], [2, 4])
+        self.assertIn('precio', response.data['details'][0]['errores'])
+        self.assertFalse(Producto.objects.exists())
+
+    def test_csv(self):
+        contenido = (
+            'nombre,descripcion,precio,cantidad,estado,id_categoria,imagenes_urls\n'
+            f'Cobre,Cable,5.00,3,Usado,{self.categoria.pk},https://img.test/a.jpg|https://img.test/b.jpg\n'
+        ).encode()
+        archivo = SimpleUploadedFile('productos.csv', contenido, content_type='text/csv')
+        response = self.client.post(self.url, {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Producto.objects.get().imagenes.count(), 2)
+
+    def test_jsonl_con_linea_invalida(self):
+        contenido = (json.dumps(self.fila(1)) + '\n{no es json\n').encode()
+        archivo = SimpleUploadedFile('productos.jsonl', contenido)
+        response = self.client.post(self.url, {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['details'][0]['fila'], 2)
+        self.assertFalse(Producto.objects.exists())
+
+    def test_lote_fuera_de_rango(self):
+        response = self.client.post(self.url + '?lote=0', [self.fila(1)], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CacheCategoriasTests(TestCase):
+    """Las categorías se sirven desde la caché con ETag hasta que alguna cambia."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.admin = Usuario.objects.create_user(
+            'Admin', 'admin@test.com', 'clave', '3000000002', 'Calle 2', is_superuser=True
+        )
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin, token='token')
+        self.lista = reverse('productos:categoria-list-create')
+        self.detalle = reverse('productos:categoria-detail', args=[self.categoria.pk])
+
+    def test_segunda_lectura_sin_consultas(self):
+        response = self.client.get(self.lista)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        with self.assertNumQueries(0):
+            repetida = self.client.get(self.lista)
+        self.assertEqual(repetida.data, response.data)
+        self.assertEqual(repetida['ETag'], response['ETag'])
+
+    def test_etag_responde_304(self):
+        etag = self.client.get(self.detalle)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Cada URL tiene su propio ETag
+        self.assertNotEqual(self.client.get(self.lista)['ETag'], etag)
+
+    def test_escrituras_invalidan(self):
+        etag = self.client.get(self.lista)['ETag']
+        response = self.admin_client.post(self.lista, {'nombre': 'Plásticos'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = self.client.get(self.lista, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Plásticos', json.dumps(response.data, ensure_ascii=False))
+
+        etag = self.client.get(self.detalle)['ETag']
+        response = self.admin_client.patch(self.detalle, {'nombre': 'Chatarra'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['nombre'], 'Chatarra')
+
+    @override_settings(PAGINACION_CONTEO_MINIMO=1000)
+    def test_conteo_pequeno_no_se_cachea(self):
+        self.assertEqual(self.client.get(self.lista).data['count'], 1)
+        # bulk_create no emite señales: otra URL evita la respuesta cacheada, no el conteo
+        Categoria.objects.bulk_create([Categoria(nombre='Vidrio')])
+        self.assertEqual(self.client.get(self.lista + '?page=1').data['count'], 2)
+
+
+class EtagProductoTests(TestCase):
+    """El detalle responde 304 mientras no cambie la versión y la edición con If-Match detecta conflictos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        cache.clear()
+        self.producto = crear_productos(self.negocio, self.categoria, 1)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.detalle = reverse('productos:producto-detail', args=[self.producto.pk])
+        self.editar = reverse('productos:producto-update', args=[self.producto.pk])
+
+    def etag(self):
+        response = self.client.get(self.detalle)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_304_con_una_consulta(self):
+        etag = self.etag()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_edicion_cambia_version_y_etag(self):
+        etag = self.etag()
+        response = self.client.patch(self.editar, {'precio': '20.00'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.version, 2)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(self.detalle, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.etag(), response['ETag'])
+
+    def test_if_match_obsoleto_412(self):
+        etag = self.etag()
+        self.client.patch(self.editar, {'precio': '20.00'}, format='json')
+        response = self.client.patch(self.editar, {'precio': '30.00'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.precio, Decimal('20.00'))
+
+    def test_categoria_y_negocio_invalidan(self):
+        etag = self.etag()
+        self.categoria.nombre = 'Chatarra'
+        self.categoria.save()
+        self.assertEqual(self.client.get(self.detalle, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.etag()
+        response = self.client.put(
+            reverse('usuarios:actualizar-usuario', args=[self.negocio.pk]), {'nombre_negocio': 'Otro'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.detalle, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['negocio_nombre'], 'Otro')
+
+
+class InventarioTests(TestCase):
+    """Los totales del negocio se mantienen con deltas y coinciden con agregar PRODUCTOS."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.otro = Usuario.objects.create_user('Otro', 'otro@test.com', 'clave', '3000000002', 'Calle 2')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+
+    def estadisticas(self):
+        response = self.client.get(reverse('productos:estadisticas'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def assertCoincide(self, negocio=None):
+        negocio = negocio or self.negocio
+        resumen = ResumenInventario.objects.get(id_negocio=negocio)
+        esperado = Producto.objects.filter(id_negocio=negocio).aggregate(**AGREGADOS)
+        self.assertEqual({campo: getattr(resumen, campo) for campo in esperado}, esperado)
+
+    def crear(self, **extra):
+        datos = {
+            'nombre': 'Cobre', 'descripcion': 'Cable', 'precio': '12.50', 'cantidad': 4,
+            'estado': 'Usado', 'id_categoria': self.categoria.pk, **extra
+        }
+        response = self.client.post(reverse('productos:producto-create'), datos, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id_producto']
+
+    def test_sin_resumen_se_reconstruye(self):
+        crear_productos(self.negocio, self.categoria, 3)
+        datos = self.estadisticas()
+        self.assertEqual((datos['total_productos'], datos['unidades_stock']), (3, 9))
+        self.assertEqual(Decimal(datos['valor_inventario']), Decimal('99.00'))
+        self.assertCoincide()
+
+    def test_deltas_por_escritura(self):
+        self.estadisticas()
+        id_producto = self.crear()
+        self.crear(precio='3.00', cantidad=2)
+        self.assertCoincide()
+
+        response = self.client.patch(
+            reverse('productos:producto-update', args=[id_producto]), {'cantidad': 1, 'precio': '40.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertCoincide()
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.delete(reverse('productos:producto-delete', args=[id_producto]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.estadisticas()['total_productos'], 1)
+        self.assertCoincide()
+        # El resumen se ajusta con un UPDATE, sin recalcular el agregado
+        self.assertFalse([c for c in consultas if 'SUM(' in c['sql']])
+
+    def test_comando_reconstruye(self):
+        crear_productos(self.negocio, self.categoria, 2)
+        crear_productos(self.otro, self.categoria, 1)
+        ResumenInventario.objects.create(id_negocio=self.negocio, total_productos=99)
+        salida = StringIO()
+        call_command('reconstruir_inventario', stdout=salida)
+        self.assertIn('2 negocios recalculados', salida.getvalue())
+        self.assertCoincide()
+        self.assertCoincide(self.otro)
+
+        ResumenInventario.objects.filter(id_negocio=self.otro).update(unidades_stock=0)
+        call_command('reconstruir_inventario', negocio=self.otro.pk, stdout=StringIO())
+        self.assertCoincide(self.otro)
+
+
+class VentasTests(TestCase):
+    """Las ventas descuentan stock en una transacción y rechazan el lote entero si falta alguno."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.otro = Usuario.objects.create_user('Otro', 'otro@test.com', 'clave', '3000000002', 'Calle 2')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        self.productos = crear_productos(self.negocio, self.categoria, 2, imagenes=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.url = reverse('productos:producto-vender')
+
+    def stock(self):
+        return list(Producto.objects.order_by('pk').values_list('cantidad', 'vendido', 'version'))
+
+    def test_venta_simple(self):
+        primero = self.productos[0]
+        response = self.client.post(self.url, {'id_producto': primero.pk, 'cantidad': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['productos'][0]['cantidad'], 1)
+        self.assertEqual(response['ETag'], etag_producto(primero.pk, 2))
+        self.assertEqual(self.stock(), [(1, True, 2), (3, False, 1)])
+        self.assertEqual(ResumenInventario.objects.get(id_negocio=self.negocio).unidades_stock, 4)
+
+    def test_lote_suma_repetidos(self):
+        primero, segundo = self.productos
+        ventas = [
+            {'id_producto': segundo.pk, 'cantidad': 1},
+            {'id_producto': primero.pk, 'cantidad': 1},
+            {'id_producto': segundo.pk, 'cantidad': 2},
+        ]
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url, ventas, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock(), [(2, True, 2), (0, True, 2)])
+        # Un solo UPDATE descuenta todo el lote
+        self.assertEqual(len([c for c in consultas if c['sql'].startswith('UPDATE "PRODUCTOS"')]), 1)
+
+    def test_stock_insuficiente_no_vende_nada(self):
+        primero, segundo = self.productos
+        ventas = [{'id_producto': primero.pk, 'cantidad': 1}, {'id_producto': segundo.pk, 'cantidad': 4}]
+        response = self.client.post(self.url, ventas, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Stock insuficiente', json.dumps(response.data, ensure_ascii=False))
+        self.assertEqual(self.stock(), [(3, False, 1), (3, False, 1)])
+
+    def test_producto_ajeno_o_invalido(self):
+        self.client.force_authenticate(self.otro)
+        response = self.client.post(self.url, {'id_producto': self.productos[0].pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Producto no encontrado.', json.dumps(response.data, ensure_ascii=False))
+
+        response = self.client.post(self.url, {'id_producto': self.productos[0].pk, 'cantidad': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post(self.url, [], format='json').status_code, 400)
+        self.assertEqual(self.stock(), [(3, False, 1), (3, False, 1)])
+
+
+class CamposDinamicosTests(TestCase):
+    """?fields= recorta el JSON y las columnas leídas; ?expand= añade campos opcionales."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+        cls.productos = crear_productos(cls.negocio, cls.categoria, 3)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+        self.url = reverse('productos:mis-productos')
+
+    def consulta_productos(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        selects = [c['sql'] for c in consultas if c['sql'].startswith('SELECT') and 'FROM "PRODUCTOS"' in c['sql']]
+        return response, selects[-1], consultas
+
+    def test_fields_limita_json_y_columnas(self):
+        response, sql, consultas = self.consulta_productos(self.url + '?fields=id_producto,nombre,inexistente')
+        self.assertEqual([set(fila) for fila in response.data['results']], [{'id_producto', 'nombre'}] * 3)
+        self.assertNotIn('"descripcion"', sql)
+        self.assertNotIn('JOIN', sql)
+        self.assertFalse([c for c in consultas if 'IMAGENES' in c['sql']])
+
+    def test_fields_con_relacion(self):
+        response, sql, _ = self.consulta_productos(self.url + '?fields=nombre,negocio_nombre')
+        self.assertEqual(response.data['results'][0]['negocio_nombre'], 'Negocio')
+        self.assertIn('"USUARIOS"', sql)
+        self.assertNotIn('"CATEGORIAS"', sql)
+
+    def test_expand(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('miniatura', response.data['results'][0])
+        response = self.client.get(self.url + '?expand=miniatura')
+        fila = response.data['results'][-1]
+        self.assertTrue(fila['miniatura'].endswith(f'/{fila["id_producto"]}/0.jpg'))
+        self.assertIn('descripcion', fila)
+
+        response = self.client.get(self.url + '?fields=id_producto,miniatura')
+        self.assertEqual(set(response.data['results'][0]), {'id_producto', 'miniatura'})
+
+    def test_detalle_conserva_etag(self):
+        url = reverse('productos:producto-detail', args=[self.productos[0].pk])
+        completo = self.client.get(url)
+        response = self.client.get(url + '?fields=nombre')
+        self.assertEqual(response.data, {'nombre': 'Producto 0'})
+        self.assertEqual(response['ETag'], completo['ETag'])
+
+
+class CatalogoTests(TestCase):
+    """Catálogo público: filtros validados, facetas disyuntivas y paginación por cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.metales = Categoria.objects.create(nombre='Metales')
+        cls.plasticos = Categoria.objects.create(nombre='Plásticos')
+        # 22 metales (precios 10..31), 3 plásticos con precio 50 (empate) y uno vendido
+        crear_productos(cls.negocio, cls.metales, 22, imagenes=0)
+        plasticos = crear_productos(cls.negocio, cls.plasticos, 3, imagenes=0)
+        Producto.objects.filter(pk__in=[p.pk for p in plasticos]).update(precio=50)
+        Producto.objects.filter(pk=plasticos[0].pk).update(estado='Nuevo')
+        Producto.objects.filter(pk=plasticos[1].pk).update(vendido=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('productos:catalogo')
+
+    def recorrer(self, query=''):
+        ids, url = [], self.url + query
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [fila['id_producto'] for fila in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_cursor_recorre_todo_sin_repetir(self):
+        esperado = list(
+            Producto.objects.filter(vendido=False).order_by('precio', 'id_producto').values_list('pk', flat=True)
+        )
+        self.assertEqual(self.recorrer('?orden=precio'), esperado)
+        self.assertEqual(self.recorrer('?orden=-precio'), esperado[::-1])
+        self.assertEqual(len(self.recorrer()), 24)
+
+    def test_filtros(self):
+        response = self.client.get(self.url, {'categoria': self.plasticos.pk})
+        self.assertEqual(len(response.data['results']), 2)
+        response = self.client.get(self.url, {'categoria': self.plasticos.pk, 'vendido': 'true'})
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(self.url, {'precio_min': '30', 'precio_max': '31.00'})
+        self.assertEqual([fila['precio'] for fila in response.data['results']], ['31.00', '30.00'])
+        response = self.client.get(self.url, {'estado': 'Nuevo'})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_parametros_invalidos(self):
+        for params in ({'categoria': 'x'}, {'precio_min': 'abc'}, {'precio_max': 'NaN'},
+                       {'vendido': 'quizas'}, {'orden': 'nombre'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.data)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'no-es-cursor'}).status_code, 404)
+
+    def test_facetas_disyuntivas(self):
+        facetas = self.client.get(self.url, {'categoria': self.plasticos.pk}).data['facetas']
+        # La faceta de categorías ignora su propio filtro; la de estados lo respeta
+        self.assertEqual(
+            [(c['nombre'], c['total']) for c in facetas['categorias']], [('Metales', 22), ('Plásticos', 2)]
+        )
+        self.assertEqual([(e['estado'], e['total']) for e in facetas['estados']], [('Nuevo', 1), ('Usado', 1)])
+
+        facetas = self.client.get(self.url, {'estado': 'Nuevo'}).data['facetas']
+        self.assertEqual([(c['nombre'], c['total']) for c in facetas['categorias']], [('Plásticos', 1)])
+        self.assertEqual([(e['estado'], e['total']) for e in facetas['estados']], [('Usado', 23), ('Nuevo', 1)])
+
+    def test_facetas_cacheadas_por_precio_y_vendido(self):
+        # Otro estado o categoría reutiliza el GROUP BY ya calculado
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url, {'estado': 'Usado'})
+        self.assertFalse([c for c in consultas if 'GROUP BY' in c['sql']])
+
+
+class EliminacionTests(TestCase):
+    """Eliminar solo marca las filas; la purga las borra después junto con sus archivos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.otro = Usuario.objects.create_user('Otro', 'otro@test.com', 'clave', '3000000002', 'Calle 2')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.almacenamiento = ImagenProducto._meta.get_field('imagen_url').storage
+        self.productos = crear_productos(self.negocio, self.categoria, 3, imagenes=0)
+        self.ajeno = crear_productos(self.otro, self.categoria, 1, imagenes=0)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.negocio)
+
+    def imagen(self, producto, nombre):
+        if not self.almacenamiento.exists(nombre):
+            self.almacenamiento.save(nombre, SimpleUploadedFile(nombre, b'img'))
+        return ImagenProducto.objects.create(id_producto=producto, imagen_url=nombre)
+
+    def test_eliminar_lote(self):
+        primero, segundo, tercero = self.productos
+        ids = [primero.pk, segundo.pk, self.ajeno.pk, 9999]
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('productos:producto-delete-lote'), {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['eliminados'], 2)
+        self.assertEqual(response.data['no_encontrados'], [self.ajeno.pk, 9999])
+        self.assertEqual(len(callbacks), 1)
+
+        self.assertEqual(list(Producto.objects.filter(id_negocio=self.negocio)), [tercero])
+        self.assertEqual(Producto.todos.filter(eliminado_en__isnull=False).count(), 2)
+        self.assertEqual(ResumenInventario.objects.get(id_negocio=self.negocio).total_productos, 1)
+        response = self.client.get(reverse('productos:producto-detail', args=[primero.pk]))
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(reverse('productos:producto-delete-lote'), {'ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_eliminar_imagenes(self):
+        propia = self.imagen(self.productos[0], 'a.jpg')
+        ajena = self.imagen(self.ajeno, 'b.jpg')
+        response = self.client.post(
+            reverse('productos:imagen-delete-lote'), {'ids': [propia.pk, ajena.pk]}, format='json'
+        )
+        self.assertEqual(response.data['eliminadas'], 1)
+        self.assertEqual(response.data['no_encontradas'], [ajena.pk])
+        self.assertFalse(ImagenProducto.objects.filter(pk=propia.pk).exists())
+        self.assertEqual(Producto.objects.get(pk=self.productos[0].pk).version, 2)
+
+        response = self.client.delete(reverse('productos:imagen-delete', args=[ajena.pk]))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(ImagenProducto.objects.filter(pk=ajena.pk).exists())
+
+    def test_purga_borra_filas_y_archivos_sin_uso(self):
+        primero, segundo, tercero = self.productos
+        self.imagen(primero, 'solo.jpg')
+        self.imagen(primero, 'compartida.jpg')
+        self.imagen(tercero, 'compartida.jpg')
+        suelta = self.imagen(tercero, 'suelta.jpg')
+        eliminar_productos([primero.pk, segundo.pk])
+        eliminar_imagenes([suelta.pk])
+
+        # Con retención todavía no se purga nada
+        call_command('purgar_eliminados', retencion_minutos=60, stdout=StringIO())
+        self.assertEqual(Producto.todos.count(), 4)
+
+        self.assertEqual(purgar_eliminados(tamano_lote=1, retencion_minutos=0), (2, 3, 2))
+        self.assertEqual(Producto.todos.count(), 2)
+        self.assertFalse(ImagenProducto.todos.filter(pk=suelta.pk).exists())
+        self.assertFalse(self.almacenamiento.exists('solo.jpg'))
+        self.assertFalse(self.almacenamiento.exists('suelta.jpg'))
+        self.assertTrue(self.almacenamiento.exists('compartida.jpg'))
+
+    @override_settings(PURGA_RETENCION_MINUTOS=30)
+    def test_con_retencion_no_encola_purga(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            eliminar_productos([self.productos[0].pk])
+        self.assertEqual(callbacks, [])
+
+
+class RecolectarMediosTests(TestCase):
+    """El comando borra solo archivos huérfanos de las carpetas de medios y fuera del periodo de gracia."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.negocio = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        cls.categoria = Categoria.objects.create(nombre='Metales')
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.almacenamiento = ImagenProducto._meta.get_field('imagen_url').storage
+        producto = crear_productos(self.negocio, self.categoria, 1, imagenes=0)[0]
+
+        for nombre in ('productos/usada.jpg', 'productos/variantes/eliminada.jpg', 'pendientes/subida.png',
+                       'productos/huerfana.jpg', 'productos/variantes/huerfana.jpg', 'otros/ajeno.jpg'):
+            self.archivo(nombre, horas=2)
+        self.archivo('productos/reciente.jpg', horas=0)
+
+        ImagenProducto.objects.create(id_producto=producto, imagen_url='productos/usada.jpg')
+        # Marcada como eliminada pero sin purgar: la purga se encarga de su archivo
+        eliminada = ImagenProducto.objects.create(id_producto=producto, imagen_url='productos/variantes/eliminada.jpg')
+        eliminar_imagenes([eliminada.pk])
+        TrabajoImagen.objects.create(id_producto=producto, archivo='pendientes/subida.png')
+
+    def archivo(self, nombre, horas):
+        self.almacenamiento.save(nombre, SimpleUploadedFile(nombre, b'x' * 100))
+        antes = time.time() - horas * 3600
+        os.utime(self.almacenamiento.path(nombre), (antes, antes))
+
+    def existentes(self):
+        raiz_medios = self.almacenamiento.location
+        return sorted(
+            os.path.relpath(os.path.join(raiz, archivo), raiz_medios)
+            for raiz, _, archivos in os.walk(raiz_medios)
+            for archivo in archivos
+        )
+
+    def recolectar(self, **opciones):
+        salida = StringIO()
+        call_command('recolectar_medios', stdout=salida, **opciones)
+        return salida.getvalue()
+
+    def test_dry_run_no_borra(self):
+        antes = self.existentes()
+        salida = self.recolectar(dry_run=True)
+        self.assertIn('2 archivos huérfanos, 200 bytes', salida)
+        self.assertEqual(self.existentes(), antes)
+
+    def test_borra_huerfanos(self):
+        salida = self.recolectar(lote=1)
+        self.assertIn('2 de 2 archivos huérfanos borrados', salida)
+        self.assertEqual(self.existentes(), [
+            'otros/ajeno.jpg',
+            'pendientes/subida.png',
+            'productos/reciente.jpg',
+            'productos/usada.jpg',
+            'productos/variantes/eliminada.jpg',
+        ])
+
+    def test_gracia(self):
+        self.recolectar(gracia_minutos=0)
+        self.assertNotIn('productos/reciente.jpg', self.existentes())
+
+    def test_lote_invalido(self):
+        with self.assertRaises(CommandError):
+            self.recolectar(lote=0)
@@ -1,19 +1,31 @@
+from django.conf import settings
 from django.urls import path
 from productos.views import (
     CategoriaListCreateView,
     CategoriaDetailView,
     
     ProductoCreateView,
+    ProductoImportarView,
+    ProductoExportarView,
     ProductoDetailView,
     ProductoUpdateView,
+    ProductoVenderView,
     ProductoDeleteView,
+    ProductoEliminarLoteView,
+    EstadisticasInventarioView,
     
     MisProductosListView,
+    CatalogoListView,
+    HistogramaPreciosView,
 
     ImagenProductoCreateView,
     ImagenProductoDeleteView,
+    ImagenEliminarLoteView,
+    TrabajoImagenDetailView,
 )
 
+from productos import views_async
+
 app_name = 'productos'
 
 urlpatterns = [
@@ -21,12 +33,39 @@ urlpatterns = [
     path('categorias/<int:id_categoria>/', CategoriaDetailView.as_view(), name='categoria-detail'),
     
     path('crear/', ProductoCreateView.as_view(), name='producto-create'),
+    path('importar/', ProductoImportarView.as_view(), name='producto-import'),
+    path('exportar/', ProductoExportarView.as_view(), name='producto-export'),
     path('<int:id_producto>/', ProductoDetailView.as_view(), name='producto-detail'),
     path('editar/<int:id_producto>/', ProductoUpdateView.as_view(), name='producto-update'),
+    path('vender/', ProductoVenderView.as_view(), name='producto-vender'),
+    path('eliminar/', ProductoEliminarLoteView.as_view(), name='producto-delete-lote'),
     path('eliminar/<int:id_producto>/', ProductoDeleteView.as_view(), name='producto-delete'),
     
     path('mis-productos/', MisProductosListView.as_view(), name='mis-productos'),
+    path('catalogo/', CatalogoListView.as_view(), name='catalogo'),
+    path('histograma-precios/', HistogramaPreciosView.as_view(), name='histograma-precios'),
+    path('estadisticas/', EstadisticasInventarioView.as_view(), name='estadisticas'),
                     
     path('imagenes/crear/', ImagenProductoCreateView.as_view(), name='imagen-create'),
+    path('imagenes/eliminar/', ImagenEliminarLoteView.as_view(), name='imagen-delete-lote'),
     path('imagenes/<int:id_imagen>/eliminar/', ImagenProductoDeleteView.as_view(), name='imagen-delete'),
-]
\ No newline at end of file
+    path('imagenes/trabajos/<int:id_trabajo>/', TrabajoImagenDetailView.as_view(), name='imagen-trabajo'),
+]
+
+if settings.LECTURA_ASYNC:
+    vistas_async = {
+        'categoria-list-create': views_async.con_lectura_async(
+            views_async.categorias, CategoriaListCreateView.as_view()
+        ),
+        'producto-detail': views_async.con_lectura_async(
+            views_async.producto_detalle, ProductoDetailView.as_view()
+        ),
+        'mis-productos': views_async.con_lectura_async(
+            views_async.mis_productos, MisProductosListView.as_view()
+        ),
+    }
+    urlpatterns = [
+        path(str(patron.pattern), vistas_async[patron.name], name=patron.name)
+        if patron.name in vistas_async else patron
+        for patron in urlpatterns
+    ]
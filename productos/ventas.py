@@ -0,0 +1,74 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from productos.inventario import aplicar_delta, sumar
+from productos.models import Producto
+
+
+def vender_productos(ventas, negocio=None):
+    """
+    Descuenta el stock de varios productos en una sola transacción.
+
+    `ventas` es una lista de {'id_producto', 'cantidad'}; si un producto se
+    repite se suman las cantidades. Las filas se bloquean en orden de PK para
+    que dos ventas en lote no se bloqueen mutuamente, y el descuento se hace
+    en un único UPDATE con F(). Si algún producto no existe o no tiene stock
+    suficiente no se vende nada. Devuelve los productos actualizados.
+    """
+    cantidades = Counter()
+    for venta in ventas:
+        cantidades[venta['id_producto']] += venta['cantidad']
+    ids = sorted(cantidades)
+
+    with transaction.atomic():
+        queryset = Producto.objects.select_for_update().filter(pk__in=ids)
+        if negocio is not None:
+            queryset = queryset.filter(id_negocio=negocio)
+        productos = {
+            producto.pk: producto
+            for producto in queryset.only('id_producto', 'id_negocio', 'precio', 'cantidad', 'vendido').order_by('pk')
+        }
+
+        errores = {}
+        for id_producto in ids:
+            producto = productos.get(id_producto)
+            if producto is None:
+                errores[str(id_producto)] = 'Producto no encontrado.'
+            elif producto.cantidad < cantidades[id_producto]:
+                errores[str(id_producto)] = f'Stock insuficiente: quedan {producto.cantidad} unidades.'
+        if errores:
+            raise serializers.ValidationError(errores)
+
+        ahora = timezone.now()
+        Producto.objects.filter(pk__in=ids).update(
+            cantidad=Case(
+                *[When(pk=id_producto, then=F('cantidad') - cantidad) for id_producto, cantidad in cantidades.items()],
+                output_field=IntegerField()
+            ),
+            vendido=True,
+            fecha_vendido=ahora,
+            version=F('version') + 1
+        )
+
+        deltas = defaultdict(list)
+        for id_producto, producto in productos.items():
+            vendidas = cantidades[id_producto]
+            deltas[producto.id_negocio_id].append({
+                'total_productos': 0,
+                'total_vendidos': 0 if producto.vendido else 1,
+                'unidades_stock': -vendidas,
+                'valor_inventario': -Decimal(producto.precio) * vendidas,
+            })
+        for id_negocio, cambios in deltas.items():
+            aplicar_delta(id_negocio, sumar(*cambios))
+
+        return list(
+            Producto.objects.filter(pk__in=ids)
+            .only('id_producto', 'cantidad', 'vendido', 'fecha_vendido', 'version')
+            .order_by('id_producto')
+        )
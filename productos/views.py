@@ -2,21 +2,55 @@ from rest_framework import status, generics, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.conf import settings
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from PIL import Image, UnidentifiedImageError
 
-from productos.models import Categoria, Producto, ImagenProducto
+from productos.cache import RespuestaCacheadaMixin, coincide_etag, etag_producto
+from productos.catalogo import calcular_facetas, leer_filtros, leer_orden
+from productos.eliminacion import eliminar_imagenes, eliminar_productos
+from productos.exportacion import en_async, exportar_csv, exportar_jsonl, filas_exportacion
+from productos.filters import BusquedaProductoFilter
+from productos.inventario import reconstruir_negocio
+from productos.importacion import importar_productos, leer_csv, leer_jsonl
+from productos.models import (
+    Categoria,
+    HistogramaPrecio,
+    ImagenProducto,
+    Producto,
+    ResumenInventario,
+    TrabajoImagen
+)
 from productos.serializers import (
     CategoriaSerializer,
+    EliminarLoteSerializer,
+    HistogramaSerializer,
     ProductoSerializer,
     ProductoDetailSerializer,
     ProductoCreateSerializer,
     ProductoUpdateSerializer,
-    ImagenProductoSerializer
+    ProductoListaRapidaSerializer,
+    ProductoVendidoSerializer,
+    ResumenInventarioSerializer,
+    TrabajoImagenSerializer,
+    VentaSerializer
 )
+from productos.tareas import encolar_trabajo
+from productos.ventas import vender_productos
+from scrap_backend.campos import CamposDinamicosVistaMixin, parametro_lista
+from scrap_backend.pagination import PaginacionKeyset
 from usuarios.permissions import IsAdminWithValidToken
 
-class CategoriaListCreateView(generics.ListCreateAPIView):
+# Ordena por PK para que el prefetch no haga JOIN con PRODUCTOS por Meta.ordering
+IMAGENES_PREFETCH = Prefetch('imagenes', queryset=ImagenProducto.objects.order_by('id_imagen'))
+
+class CategoriaListCreateView(RespuestaCacheadaMixin, generics.ListCreateAPIView):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     
@@ -25,8 +59,13 @@ class CategoriaListCreateView(generics.ListCreateAPIView):
             return [IsAdminWithValidToken()]
         return [IsAuthenticated()]
 
+    def list(self, request, *args, **kwargs):
+        return self.respuesta_cacheada(
+            request, lambda: super(CategoriaListCreateView, self).list(request, *args, **kwargs).data
+        )
+
 
-class CategoriaDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CategoriaDetailView(RespuestaCacheadaMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
     lookup_field = 'id_categoria'
@@ -36,6 +75,11 @@ class CategoriaDetailView(generics.RetrieveUpdateDestroyAPIView):
             return [IsAuthenticated()]
         return [IsAdminWithValidToken()]
 
+    def retrieve(self, request, *args, **kwargs):
+        return self.respuesta_cacheada(
+            request, lambda: super(CategoriaDetailView, self).retrieve(request, *args, **kwargs).data
+        )
+
 
 class ProductoCreateView(generics.CreateAPIView):
     queryset = Producto.objects.all()
@@ -45,11 +89,110 @@ class ProductoCreateView(generics.CreateAPIView):
     def perform_create(self, serializer):
         serializer.save(id_negocio=self.request.user)
 
-class ProductoDetailView(generics.RetrieveAPIView):
-    queryset = Producto.objects.select_related('id_categoria', 'id_negocio').prefetch_related('imagenes')
+class ProductoImportarView(APIView):
+    """
+    Importación masiva: acepta un arreglo JSON de productos o un archivo
+    `archivo` CSV/JSONL. `?lote=` ajusta el tamaño de cada bulk_create.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        archivo = request.FILES.get('archivo')
+        if archivo is not None:
+            lector = leer_csv if archivo.name.lower().endswith('.csv') else leer_jsonl
+            filas = lector(archivo.open('rb'))
+        elif isinstance(request.data, list):
+            filas = request.data
+        else:
+            return Response({
+                'error': 'Envía un arreglo JSON de productos o un archivo CSV/JSONL en "archivo"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            tamano_lote = int(request.query_params.get('lote', settings.IMPORTACION_TAMANO_LOTE))
+        except ValueError:
+            tamano_lote = 0
+        if not 1 <= tamano_lote <= 10000:
+            return Response({
+                'error': 'El parámetro lote debe estar entre 1 y 10000'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        creados, errores = importar_productos(
+            filas,
+            negocio=request.user,
+            tamano_lote=tamano_lote,
+            context={'request': request}
+        )
+
+        if errores:
+            return Response({
+                'error': 'Datos inválidos, no se importó ningún producto',
+                'total_errores': len(errores),
+                'details': errores[:settings.IMPORTACION_MAX_ERRORES]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'message': 'Productos importados exitosamente',
+            'creados': creados
+        }, status=status.HTTP_201_CREATED)
+
+class ProductoExportarView(APIView):
+    """
+    Descarga todo el inventario del negocio como `?formato=csv` (por defecto)
+    o `jsonl`, con los filtros del catálogo (sin filtrar vendido si no se
+    indica). La respuesta se genera por bloques mientras se lee, con
+    memoria constante.
+    """
+    permission_classes = [IsAuthenticated]
+    formatos = {
+        'csv': (exportar_csv, 'text/csv; charset=utf-8'),
+        'jsonl': (exportar_jsonl, 'application/x-ndjson; charset=utf-8'),
+    }
+
+    def get(self, request):
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in self.formatos:
+            return Response({
+                'error': 'El formato debe ser csv o jsonl'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        filtros = leer_filtros(request.query_params, vendido=None)
+        queryset = Producto.objects.filter(id_negocio=request.user).filtrar(**filtros)
+
+        escribir, content_type = self.formatos[formato]
+        partes = escribir(filas_exportacion(queryset, request, settings.EXPORTACION_TAMANO_BLOQUE))
+        if isinstance(request._request, ASGIRequest):
+            partes = en_async(partes)
+
+        response = StreamingHttpResponse(partes, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="productos-{request.user.pk}.{formato}"'
+        return response
+
+
+class ProductoDetailView(CamposDinamicosVistaMixin, generics.RetrieveAPIView):
+    queryset = Producto.objects.select_related('id_categoria', 'id_negocio').prefetch_related(IMAGENES_PREFETCH)
     serializer_class = ProductoDetailSerializer
     permission_classes = [IsAuthenticated]
     lookup_field = 'id_producto'
+    prefetch_campos = {'imagenes': IMAGENES_PREFETCH}
+    campos_siempre = ('version',)
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.headers.get('If-None-Match'):
+            version = Producto.objects.filter(
+                id_producto=kwargs['id_producto']
+            ).values_list('version', flat=True).first()
+            if version is not None:
+                etag = etag_producto(kwargs['id_producto'], version)
+                if coincide_etag(request, etag):
+                    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={
+            'ETag': etag_producto(instance.id_producto, instance.version),
+            'Cache-Control': 'private, no-cache'
+        })
 
 
 class ProductoUpdateView(generics.UpdateAPIView):
@@ -60,9 +203,63 @@ class ProductoUpdateView(generics.UpdateAPIView):
     
     def get_queryset(self):
         user = self.request.user
+        queryset = Producto.objects.all()
+        if self.request.headers.get('If-Match'):
+            # Bloquea la fila entre la comprobación del ETag y el guardado
+            queryset = queryset.select_for_update()
         if user.is_superuser:
-            return Producto.objects.all()
-        return Producto.objects.filter(id_negocio=user)
+            return queryset
+        return queryset.filter(id_negocio=user)
+
+    def update(self, request, *args, **kwargs):
+        if not request.headers.get('If-Match'):
+            response = super().update(request, *args, **kwargs)
+        else:
+            with transaction.atomic():
+                instance = self.get_object()
+                if not coincide_etag(request, etag_producto(instance.id_producto, instance.version), 'If-Match'):
+                    return Response({
+                        'error': 'El producto fue modificado por otra petición. Vuelve a cargarlo.'
+                    }, status=status.HTTP_412_PRECONDITION_FAILED)
+                response = super().update(request, *args, **kwargs)
+
+        instance = getattr(self, 'instancia_actualizada', None)
+        if instance is not None:
+            response['ETag'] = etag_producto(instance.id_producto, instance.version)
+        return response
+
+    def perform_update(self, serializer):
+        self.instancia_actualizada = serializer.save()
+
+
+class ProductoVenderView(APIView):
+    """
+    Registra ventas: acepta {"id_producto", "cantidad"} o un arreglo de ellos.
+    Todo el lote se descuenta en una transacción; si a alguno le falta stock
+    no se vende ninguno.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        en_lote = isinstance(request.data, list)
+        serializer = VentaSerializer(data=request.data, many=en_lote)
+        serializer.is_valid(raise_exception=True)
+        ventas = serializer.validated_data if en_lote else [serializer.validated_data]
+        if not ventas:
+            return Response({
+                'error': 'Envía al menos una venta'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        negocio = None if request.user.is_superuser else request.user
+        productos = vender_productos(ventas, negocio=negocio)
+
+        response = Response({
+            'message': 'Venta registrada exitosamente',
+            'productos': ProductoVendidoSerializer(productos, many=True).data
+        }, status=status.HTTP_200_OK)
+        if len(productos) == 1:
+            response['ETag'] = etag_producto(productos[0].id_producto, productos[0].version)
+        return response
 
 
 class ProductoDeleteView(generics.DestroyAPIView):
@@ -76,55 +273,218 @@ class ProductoDeleteView(generics.DestroyAPIView):
             return Producto.objects.all()
         return Producto.objects.filter(id_negocio=user)
 
-class MisProductosListView(generics.ListAPIView):
+    def perform_destroy(self, instance):
+        # Solo se marca; la purga borra la fila, sus imágenes y archivos después
+        eliminar_productos([instance.pk])
+
+class ProductoEliminarLoteView(APIView):
+    """Elimina varios productos propios con {"ids": [...]} en un solo UPDATE."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = EliminarLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        negocio = None if request.user.is_superuser else request.user
+        eliminados = eliminar_productos(ids, negocio=negocio)
+
+        return Response({
+            'message': 'Productos eliminados exitosamente',
+            'eliminados': len(eliminados),
+            'no_encontrados': sorted(set(ids) - set(eliminados))
+        }, status=status.HTTP_200_OK)
+
+class EstadisticasInventarioView(generics.RetrieveAPIView):
+    """Totales del negocio autenticado, leídos de RESUMENES_INVENTARIO."""
+    serializer_class = ResumenInventarioSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self):
+        resumen = ResumenInventario.objects.filter(id_negocio=self.request.user).first()
+        if resumen is None:
+            resumen = reconstruir_negocio(self.request.user.pk)
+        return resumen
+
+class MisProductosListView(CamposDinamicosVistaMixin, generics.ListAPIView):
     serializer_class = ProductoSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [BusquedaProductoFilter, filters.OrderingFilter]
     search_fields = ['nombre', 'descripcion']
     ordering_fields = ['fecha_creacion', 'precio', 'nombre']
-    ordering = ['-fecha_creacion']
+    # Sin `ordering` por defecto: se usa Meta.ordering y, al buscar, la relevancia
+    orden_keyset = ('-fecha_creacion', '-id_producto')
+    prefetch_campos = {'imagenes': IMAGENES_PREFETCH}
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Producto.objects.filter(id_negocio=user).select_related('id_categoria')
-        
-        categoria_id = self.request.query_params.get('categoria', None)
-        if categoria_id:
-            queryset = queryset.filter(id_categoria=categoria_id)
-        
-        estado = self.request.query_params.get('estado', None)
-        if estado:
-            queryset = queryset.filter(estado=estado)
+        queryset = Producto.objects.filter(id_negocio=user).select_related(
+            'id_categoria', 'id_negocio'
+        ).prefetch_related(IMAGENES_PREFETCH)
         
         vendido = self.request.query_params.get('vendido', None)
-        if vendido is not None:
-            vendido_bool = vendido.lower() == 'true'
-            queryset = queryset.filter(vendido=vendido_bool)
         
+        return queryset.filtrar(
+            categoria=self.request.query_params.get('categoria', None),
+            estado=self.request.query_params.get('estado', None),
+            vendido=vendido.lower() == 'true' if vendido is not None else None
+        )
+
+    def usa_serializador_rapido(self):
+        return (
+            settings.SERIALIZADOR_RAPIDO_PRODUCTOS
+            and parametro_lista(self.request, 'fields') is None
+            and parametro_lista(self.request, 'expand') is None
+        )
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.usa_serializador_rapido():
+            queryset = ProductoListaRapidaSerializer.consulta(queryset)
         return queryset
 
+    def get_serializer(self, *args, **kwargs):
+        if self.usa_serializador_rapido():
+            return ProductoListaRapidaSerializer(*args, context=self.get_serializer_context(), **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+
+class CatalogoListView(CamposDinamicosVistaMixin, generics.ListAPIView):
+    """
+    Catálogo público de todos los negocios. Filtros: categoria, estado,
+    precio_min, precio_max y vendido (por defecto false); `orden` acepta
+    reciente, precio o -precio. Pagina por cursor y añade conteos por
+    categoría y estado en `facetas`.
+    """
+    serializer_class = ProductoSerializer
+    permission_classes = [AllowAny]
+    pagination_class = PaginacionKeyset
+    prefetch_campos = {'imagenes': IMAGENES_PREFETCH}
+
+    @property
+    def orden_keyset(self):
+        return leer_orden(self.request.query_params)
+
+    def get_queryset(self):
+        self.filtros = leer_filtros(self.request.query_params)
+        return Producto.objects.select_related(
+            'id_categoria', 'id_negocio'
+        ).prefetch_related(IMAGENES_PREFETCH).filtrar(**self.filtros)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['facetas'] = calcular_facetas(self.filtros)
+        return response
+
+class HistogramaPreciosView(APIView):
+    """
+    Distribución de precios de productos disponibles para el slider del
+    catálogo (`?categoria=` opcional). Se lee de HISTOGRAMA_PRECIOS, que
+    mantiene el comando refrescar_histograma.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        categoria = request.query_params.get('categoria') or None
+        if categoria is not None and not categoria.isdigit():
+            return Response({
+                'error': 'El parámetro categoria debe ser un ID'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if categoria:
+            cubetas = HistogramaPrecio.objects.filter(id_categoria=categoria)
+        else:
+            cubetas = HistogramaPrecio.objects.filter(id_categoria__isnull=True)
+        cubetas = list(cubetas.order_by('cubeta'))
+
+        return Response(HistogramaSerializer({
+            'categoria': int(categoria) if categoria else None,
+            'fecha_calculo': cubetas[0].fecha_calculo if cubetas else None,
+            'cubetas': cubetas
+        }).data, status=status.HTTP_200_OK)
+
 class ImagenProductoCreateView(generics.CreateAPIView):
-    queryset = ImagenProducto.objects.all()
-    serializer_class = ImagenProductoSerializer
+    """
+    Recibe la imagen, la guarda tal cual en `pendientes/` y encola su
+    procesamiento; responde 202 con el trabajo para consultar su estado.
+    """
+    queryset = TrabajoImagen.objects.all()
+    serializer_class = TrabajoImagenSerializer
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        print(request.data)
         id_producto = request.data.get('id_producto')
         imagen = request.FILES.get('imagen_url')  
 
         if not imagen:
             return Response({'error': 'No se envió ninguna imagen'}, status=status.HTTP_400_BAD_REQUEST)
 
-        nueva_imagen = ImagenProducto.objects.create(
-            id_producto_id=id_producto,
-            imagen_url=imagen  
-        )
+        if not str(id_producto).isdigit():
+            return Response({'error': 'El campo id_producto debe ser un ID'}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = ImagenProductoSerializer(nueva_imagen)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        productos = Producto.objects.all()
+        if not request.user.is_superuser:
+            productos = productos.filter(id_negocio=request.user)
+        producto = get_object_or_404(productos, id_producto=id_producto)
+
+        try:
+            Image.open(imagen)
+        except UnidentifiedImageError:
+            return Response({'error': 'El archivo no es una imagen válida'}, status=status.HTTP_400_BAD_REQUEST)
+        imagen.seek(0)
+
+        trabajo = TrabajoImagen.objects.create(id_producto=producto, archivo=imagen)
+        encolar_trabajo(trabajo.id_trabajo)
+
+        serializer = TrabajoImagenSerializer(trabajo, context={'request': request})
+        return Response({
+            **serializer.data,
+            'url_estado': request.build_absolute_uri(
+                reverse('productos:imagen-trabajo', args=[trabajo.id_trabajo])
+            )
+        }, status=status.HTTP_202_ACCEPTED)
+
+class TrabajoImagenDetailView(generics.RetrieveAPIView):
+    serializer_class = TrabajoImagenSerializer
+    permission_classes = [IsAuthenticated]
+    lookup_field = 'id_trabajo'
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = TrabajoImagen.objects.select_related('id_imagen')
+        if user.is_superuser:
+            return queryset
+        return queryset.filter(id_producto__id_negocio=user)
 
 class ImagenProductoDeleteView(generics.DestroyAPIView):
     queryset = ImagenProducto.objects.all()
     permission_classes = [IsAuthenticated]
-    lookup_field = 'id_imagen'
\ No newline at end of file
+    lookup_field = 'id_imagen'
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return ImagenProducto.objects.all()
+        return ImagenProducto.objects.filter(id_producto__id_negocio=user)
+
+    def perform_destroy(self, instance):
+        user = self.request.user
+        eliminar_imagenes([instance.pk], negocio=None if user.is_superuser else user)
+
+class ImagenEliminarLoteView(APIView):
+    """Elimina varias imágenes de productos propios con {"ids": [...]}."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = EliminarLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        negocio = None if request.user.is_superuser else request.user
+        eliminadas = eliminar_imagenes(ids, negocio=negocio)
+
+        return Response({
+            'message': 'Imágenes eliminadas exitosamente',
+            'eliminadas': len(eliminadas),
+            'no_encontradas': sorted(set(ids) - set(eliminadas))
+        }, status=status.HTTP_200_OK)
\ No newline at end of file
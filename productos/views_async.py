@@ -0,0 +1,145 @@
+"""
+Camino de lectura async (ASGI) para los endpoints más consultados.
+
+Reutiliza las vistas DRF para filtros, serializadores y paginación, pero
+autentica, consulta y responde sin ocupar un hilo por petición mientras
+espera a la base de datos. Solo admite autenticación por token.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from productos.cache import (
+    RespuestaCacheadaMixin,
+    aversion_categorias,
+    clave_respuesta,
+    coincide_etag,
+    etag_producto
+)
+from productos.models import Producto
+from productos.views import CategoriaListCreateView, MisProductosListView, ProductoDetailView
+from scrap_backend.pagination import PaginacionKeyset
+from usuarios.authentication import CachedTokenAuthentication, autenticar_async
+
+
+def respuesta_json(datos, status=status.HTTP_200_OK, headers=None):
+    contenido = b'' if datos is None else JSONRenderer().render(datos)
+    return HttpResponse(contenido, status=status, content_type='application/json', headers=headers)
+
+
+def error(exc):
+    """Mismo cuerpo, estado y cabeceras que daría la vista DRF síncrona."""
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.auth_header = CachedTokenAuthentication.keyword
+    response = api_settings.EXCEPTION_HANDLER(exc, {})
+    headers = {
+        cabecera: response[cabecera]
+        for cabecera in ('WWW-Authenticate', 'Retry-After')
+        if response.has_header(cabecera)
+    }
+    return respuesta_json(response.data, status=response.status_code, headers=headers)
+
+
+async def preparar_vista(clase, request, **kwargs):
+    """Autentica la petición y devuelve una instancia de la vista DRF lista para usar."""
+    resultado = await autenticar_async(request)
+    if resultado is None:
+        raise exceptions.NotAuthenticated()
+
+    vista = clase()
+    vista.args = ()
+    vista.kwargs = kwargs
+    vista.format_kwarg = None
+    vista.headers = {}
+    vista.request = vista.initialize_request(request, **kwargs)
+    vista.request.user, vista.request.auth = resultado
+    return vista
+
+
+def con_lectura_async(vista_async, vista_sync):
+    """GET/HEAD van a la vista async; el resto de métodos a la vista DRF de siempre."""
+    async def despachar(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await vista_async(request, *args, **kwargs)
+        return await sync_to_async(vista_sync)(request, *args, **kwargs)
+
+    despachar.csrf_exempt = True
+    return despachar
+
+
+async def producto_detalle(request, id_producto):
+    try:
+        vista = await preparar_vista(ProductoDetailView, request, id_producto=id_producto)
+    except exceptions.APIException as exc:
+        return error(exc)
+
+    version_cat = await aversion_categorias()
+    if request.headers.get('If-None-Match'):
+        version = await Producto.objects.filter(
+            id_producto=id_producto
+        ).values_list('version', flat=True).afirst()
+        if version is not None:
+            etag = etag_producto(id_producto, version, version_cat)
+            if coincide_etag(request, etag):
+                return respuesta_json(None, status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    producto = await vista.filter_queryset(vista.get_queryset()).filter(id_producto=id_producto).afirst()
+    if producto is None:
+        # El mismo mensaje que get_object_or_404 en la vista síncrona
+        return error(Http404(f'No {Producto._meta.object_name} matches the given query.'))
+
+    return respuesta_json(vista.get_serializer(producto).data, headers={
+        'ETag': etag_producto(producto.id_producto, producto.version, version_cat),
+        'Cache-Control': 'private, no-cache'
+    })
+
+
+async def mis_productos(request):
+    try:
+        vista = await preparar_vista(MisProductosListView, request)
+        queryset = vista.filter_queryset(vista.get_queryset())
+        paginador = vista.paginator
+
+        if paginador.usa_cursor(vista.request, vista):
+            paginador.validar_orden_cursor(vista.request, vista)
+            paginador.keyset = PaginacionKeyset()
+            consulta = paginador.keyset.preparar(queryset, vista.request, vista)
+            pagina = paginador.keyset.recortar([producto async for producto in consulta])
+        else:
+            # La paginación por número usa el Paginator síncrono de Django (COUNT + OFFSET)
+            pagina = await sync_to_async(paginador.paginate_queryset)(queryset, vista.request, vista)
+    except exceptions.APIException as exc:
+        return error(exc)
+
+    serializador = vista.get_serializer(pagina, many=True)
+    if vista.usa_serializador_rapido():
+        # El serializador rápido consulta las imágenes de la página al construir .data
+        datos = await sync_to_async(lambda: serializador.data)()
+    else:
+        datos = serializador.data
+    return respuesta_json(paginador.get_paginated_response(datos).data)
+
+
+async def categorias(request):
+    try:
+        vista = await preparar_vista(CategoriaListCreateView, request)
+    except exceptions.APIException as exc:
+        return error(exc)
+
+    huella, headers = RespuestaCacheadaMixin.huella_respuesta(request, await aversion_categorias())
+    if coincide_etag(request, headers['ETag']):
+        return respuesta_json(None, status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # En régimen estable la respuesta sale de la caché sin tocar la base de datos
+    datos = await cache.aget(clave_respuesta(huella))
+    if datos is not None:
+        return respuesta_json(datos, headers=headers)
+
+    respuesta = await sync_to_async(vista.list)(vista.request)
+    return respuesta_json(respuesta.data, status=respuesta.status_code, headers={
+        'ETag': respuesta['ETag'],
+        'Cache-Control': respuesta['Cache-Control']
+    })
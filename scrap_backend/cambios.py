@@ -0,0 +1,20 @@
+def aplicar_cambios(instancia, datos):
+    """
+    Asigna en `instancia` solo los valores de `datos` que difieren de los
+    actuales y devuelve los nombres de los campos modificados, listos para
+    `save(update_fields=...)`. Las FK se comparan por id para no cargar el
+    objeto relacionado.
+    """
+    cambiados = []
+    for nombre, valor in datos.items():
+        campo = instancia._meta.get_field(nombre)
+        if campo.many_to_one or campo.one_to_one:
+            actual = getattr(instancia, campo.attname)
+            nuevo = getattr(valor, 'pk', valor)
+        else:
+            actual = getattr(instancia, nombre)
+            nuevo = valor
+        if actual != nuevo:
+            setattr(instancia, nombre, valor)
+            cambiados.append(nombre)
+    return cambiados
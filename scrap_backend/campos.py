@@ -0,0 +1,102 @@
+"""
+Selección de campos por query string (`?fields=` y `?expand=`).
+
+`?fields=id_producto,nombre` limita tanto el JSON como las columnas que se
+leen de la base de datos; `?expand=` añade campos opcionales que el
+serializador no incluye por defecto (Meta.campos_expandibles).
+"""
+
+
+def parametro_lista(request, nombre):
+    valor = request.query_params.get(nombre) if request else None
+    if not valor:
+        return None
+    return [campo.strip() for campo in valor.split(',') if campo.strip()]
+
+
+class CamposDinamicosMixin:
+    """
+    Mixin de serializador. Acepta `campos` (lista o None para todos) y
+    `expandir`; los nombres desconocidos se ignoran.
+    """
+
+    def __init__(self, *args, campos=None, expandir=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expandibles = set(getattr(self.Meta, 'campos_expandibles', ()))
+        pedidos = set(campos or ()) | set(expandir or ())
+        for nombre in list(self.fields):
+            if campos is not None and nombre not in campos:
+                self.fields.pop(nombre)
+            elif nombre in expandibles and nombre not in pedidos:
+                self.fields.pop(nombre)
+
+    def consulta_necesaria(self):
+        """
+        Devuelve (columnas, select_related, prefetch_related) que necesitan
+        los campos activos, a partir de su `source` o de Meta.fuentes para
+        los SerializerMethodField.
+        """
+        modelo = self.Meta.model
+        fuentes = getattr(self.Meta, 'fuentes', {})
+        columnas, completas, select, prefetch = set(), set(), set(), set()
+
+        for nombre, campo in self.fields.items():
+            fuente = fuentes.get(nombre, campo.source)
+            if fuente == '*':
+                continue
+            partes = fuente.split('.')
+            campo_modelo = modelo._meta.get_field(partes[0])
+            if campo_modelo.one_to_many or campo_modelo.many_to_many:
+                prefetch.add(partes[0])
+            elif campo_modelo.many_to_one or campo_modelo.one_to_one:
+                select.add(partes[0])
+                if len(partes) > 1:
+                    columnas.add('__'.join(partes[:2]))
+                else:
+                    completas.add(partes[0])
+            else:
+                columnas.add(partes[0])
+
+        # Una relación serializada entera no puede quedar limitada a algunas columnas
+        columnas = {c for c in columnas if c.split('__')[0] not in completas}
+        columnas |= select
+        return columnas, select, prefetch
+
+
+class CamposDinamicosVistaMixin:
+    """
+    Mixin de vista genérica para serializadores con CamposDinamicosMixin.
+
+    `prefetch_campos` asocia cada relación inversa con el Prefetch a usar;
+    las columnas de `campos_siempre` y de `orden_keyset` se leen siempre
+    porque la vista (ETag, cursor) las necesita aunque no se serialicen.
+    """
+    prefetch_campos = {}
+    campos_siempre = ()
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('campos', parametro_lista(self.request, 'fields'))
+        kwargs.setdefault('expandir', parametro_lista(self.request, 'expand'))
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        # En filter_queryset y no en get_queryset: las vistas suelen redefinir este último
+        queryset = super().filter_queryset(queryset)
+        if parametro_lista(self.request, 'fields') is None:
+            return queryset
+
+        columnas, select, prefetch = self.get_serializer().consulta_necesaria()
+        modelo = queryset.model
+        ordenables = [*getattr(self, 'orden_keyset', ()), *(getattr(self, 'ordering_fields', None) or ())]
+        columnas_modelo = {campo.name for campo in modelo._meta.concrete_fields}
+        columnas |= {modelo._meta.pk.name, *self.campos_siempre}
+        columnas |= {campo.lstrip('-') for campo in ordenables} & columnas_modelo
+
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*[
+                self.prefetch_campos.get(relacion, relacion) for relacion in prefetch
+            ])
+        return queryset.only(*columnas)
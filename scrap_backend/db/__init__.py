@@ -0,0 +1,30 @@
+import time
+from contextvars import ContextVar
+
+# Métricas de la petición en curso; None fuera de TiempoBaseDatosMiddleware.
+# Es una ContextVar para que también las acumulen los hilos de sync_to_async.
+metricas_bd = ContextVar('metricas_bd', default=None)
+
+
+def nuevas_metricas():
+    return {'conexiones': 0, 'tiempo_conexion': 0.0, 'consultas': 0, 'tiempo_consultas': 0.0}
+
+
+def registrar_conexion(inicio):
+    metricas = metricas_bd.get()
+    if metricas is not None:
+        metricas['conexiones'] += 1
+        metricas['tiempo_conexion'] += time.perf_counter() - inicio
+
+
+def medir_consulta(execute, sql, params, many, context):
+    metricas = metricas_bd.get()
+    if metricas is None:
+        return execute(sql, params, many, context)
+
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metricas['consultas'] += 1
+        metricas['tiempo_consultas'] += time.perf_counter() - inicio
@@ -0,0 +1,23 @@
+import time
+
+from django.db.backends.postgresql import base
+
+from scrap_backend.db import medir_consulta, registrar_conexion
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Backend PostgreSQL de Django que registra cuánto tarda abrir cada conexión
+    (TCP + TLS + autenticación, o tomarla del pool) y cada consulta.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(medir_consulta)
+
+    def get_new_connection(self, conn_params):
+        inicio = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            registrar_conexion(inicio)
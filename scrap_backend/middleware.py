@@ -0,0 +1,127 @@
+import hashlib
+import logging
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.decorators import sync_and_async_middleware
+
+from scrap_backend.db import metricas_bd, nuevas_metricas
+from scrap_backend.routers import usar_primaria
+
+logger = logging.getLogger('scrap_backend.bd')
+
+
+def agregar_server_timing(request, response, metricas):
+    response['Server-Timing'] = (
+        f'db-conexion;dur={metricas["tiempo_conexion"] * 1000:.1f};desc="{metricas["conexiones"]} conexiones", '
+        f'db-consultas;dur={metricas["tiempo_consultas"] * 1000:.1f};desc="{metricas["consultas"]} consultas"'
+    )
+    logger.info(
+        '%s %s conexion=%.1fms (%d) consultas=%.1fms (%d)',
+        request.method,
+        request.path,
+        metricas['tiempo_conexion'] * 1000,
+        metricas['conexiones'],
+        metricas['tiempo_consultas'] * 1000,
+        metricas['consultas']
+    )
+    return response
+
+
+@sync_and_async_middleware
+def tiempo_base_datos_middleware(get_response):
+    """
+    Separa, por petición, el tiempo de abrir conexiones del tiempo de las
+    consultas y lo expone en la cabecera Server-Timing y en el log.
+    Requiere el ENGINE scrap_backend.db.postgresql.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            metricas = nuevas_metricas()
+            token = metricas_bd.set(metricas)
+            try:
+                response = await get_response(request)
+            finally:
+                metricas_bd.reset(token)
+            return agregar_server_timing(request, response, metricas)
+    else:
+        def middleware(request):
+            metricas = nuevas_metricas()
+            token = metricas_bd.set(metricas)
+            try:
+                response = get_response(request)
+            finally:
+                metricas_bd.reset(token)
+            return agregar_server_timing(request, response, metricas)
+
+    return middleware
+
+
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def clave_de(credencial):
+    if not credencial:
+        return None
+    return 'primaria:' + hashlib.sha256(credencial.encode()).hexdigest()
+
+
+def clave_pegajosa(request):
+    """Identifica al cliente por su token o su cookie de sesión."""
+    return clave_de(request.headers.get('Authorization') or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+
+
+def emitir_credencial(request, credencial):
+    """
+    Para vistas que entregan una credencial nueva (p. ej. el login, que llega
+    sin Authorization): sus siguientes lecturas también van a la primaria.
+    `credencial` es el valor de Authorization que usará el cliente.
+    """
+    request.credencial_emitida = credencial
+
+
+def claves_escritura(request, response, clave):
+    if request.method in METODOS_SEGUROS or response.status_code >= 400:
+        return []
+    emitida = clave_de(getattr(request, 'credencial_emitida', None))
+    return [candidata for candidata in (clave, emitida) if candidata]
+
+
+def marcar_escritura(request, response, clave):
+    for escrita in claves_escritura(request, response, clave):
+        cache.set(escrita, True, settings.REPLICA_PEGAJOSA_SEGUNDOS)
+    return response
+
+
+@sync_and_async_middleware
+def replica_middleware(get_response):
+    """
+    Marca las peticiones GET/HEAD/OPTIONS para leer de la réplica, salvo que
+    el mismo cliente haya escrito hace menos de REPLICA_PEGAJOSA_SEGUNDOS
+    (así ve sus propios cambios aunque la réplica vaya con retraso).
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            clave = clave_pegajosa(request)
+            primaria = request.method not in METODOS_SEGUROS or (clave and await cache.aget(clave))
+            token = usar_primaria.set(bool(primaria))
+            try:
+                response = await get_response(request)
+            finally:
+                usar_primaria.reset(token)
+            for escrita in claves_escritura(request, response, clave):
+                await cache.aset(escrita, True, settings.REPLICA_PEGAJOSA_SEGUNDOS)
+            return response
+    else:
+        def middleware(request):
+            clave = clave_pegajosa(request)
+            primaria = request.method not in METODOS_SEGUROS or (clave and cache.get(clave))
+            token = usar_primaria.set(bool(primaria))
+            try:
+                response = get_response(request)
+            finally:
+                usar_primaria.reset(token)
+            return marcar_escritura(request, response, clave)
+
+    return middleware
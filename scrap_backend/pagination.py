@@ -0,0 +1,167 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework import filters, pagination, serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginadorConteoCacheado(DjangoPaginator):
+    """
+    Paginator que guarda el COUNT(*) de cada consulta durante
+    PAGINACION_CONTEO_SEGUNDOS para no repetirlo en cada página.
+    Solo se guardan conteos de al menos PAGINACION_CONTEO_MINIMO filas:
+    los pequeños son baratos y se mantienen exactos.
+    """
+
+    @cached_property
+    def count(self):
+        segundos = getattr(settings, 'PAGINACION_CONTEO_SEGUNDOS', 0)
+        query = getattr(self.object_list, 'query', None)
+        if not segundos or query is None:
+            return super().count
+
+        sql, params = query.sql_with_params()
+        clave = 'conteo:' + hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        conteo = cache.get(clave)
+        if conteo is None:
+            conteo = self.object_list.count()
+            if conteo >= settings.PAGINACION_CONTEO_MINIMO:
+                cache.set(clave, conteo, segundos)
+        return conteo
+
+
+class PaginacionKeyset(pagination.BasePagination):
+    """
+    Paginación por cursor sobre una clave compuesta (p. ej. fecha + id).
+
+    Cada página filtra con `WHERE (fecha, id) < (cursor)` en lugar de OFFSET,
+    así que la página 1000 cuesta lo mismo que la primera. La vista declara
+    la clave en `orden_keyset`; no hay conteo total ni enlace anterior.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+
+    def preparar(self, queryset, request, view):
+        self.request = request
+        self.orden = list(view.orden_keyset)
+        queryset = queryset.order_by(*self.orden)
+
+        posicion = self.decodificar_cursor(request)
+        if posicion is not None:
+            try:
+                queryset = queryset.filter(self.filtro_posicion(posicion))
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound('Cursor inválido.')
+
+        return queryset[:self.page_size + 1]
+
+    def recortar(self, resultados):
+        self.hay_siguiente = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        self.ultimo = resultados[-1] if resultados else None
+        return resultados
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.recortar(list(self.preparar(queryset, request, view)))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def filtro_posicion(self, posicion):
+        filtro = Q()
+        iguales = {}
+        for campo, valor in zip(self.orden, posicion):
+            nombre = campo.lstrip('-')
+            lookup = 'lt' if campo.startswith('-') else 'gt'
+            filtro |= Q(**iguales, **{f'{nombre}__{lookup}': valor})
+            iguales[nombre] = valor
+        return filtro
+
+    def valor_de(self, objeto, campo):
+        nombre = campo.lstrip('-')
+        valor = objeto[nombre] if isinstance(objeto, dict) else getattr(objeto, nombre)
+        return valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+    def decodificar_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            posicion = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, TypeError):
+            raise NotFound('Cursor inválido.')
+        if not isinstance(posicion, list) or len(posicion) != len(self.orden):
+            raise NotFound('Cursor inválido.')
+        return posicion
+
+    def get_next_link(self):
+        if not self.hay_siguiente:
+            return None
+        posicion = [self.valor_de(self.ultimo, campo) for campo in self.orden]
+        cursor = base64.urlsafe_b64encode(json.dumps(posicion).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            cursor
+        )
+
+
+class PaginacionFlexible(pagination.PageNumberPagination):
+    """
+    Paginación por número de página (con conteo cacheado) por defecto.
+    Con `?paginacion=cursor` o `?cursor=...` usa PaginacionKeyset
+    en las vistas que definen `orden_keyset`; en ese modo no se admite
+    búsqueda ni otro `ordering`.
+    """
+    django_paginator_class = PaginadorConteoCacheado
+    modo_query_param = 'paginacion'
+    keyset = None
+
+    def usa_cursor(self, request, view):
+        if not getattr(view, 'orden_keyset', None):
+            return False
+        return (
+            request.query_params.get(self.modo_query_param) == 'cursor'
+            or PaginacionKeyset.cursor_query_param in request.query_params
+        )
+
+    def validar_orden_cursor(self, request, view):
+        # El cursor solo sigue `orden_keyset`; otro orden o la relevancia darían páginas incoherentes
+        orden = list(view.orden_keyset)
+        for backend in getattr(view, 'filter_backends', ()):
+            if issubclass(backend, filters.SearchFilter) and request.query_params.get(backend.search_param):
+                raise serializers.ValidationError({
+                    backend.search_param: 'No se puede buscar con paginación por cursor.'
+                })
+            if issubclass(backend, filters.OrderingFilter) and request.query_params.get(backend.ordering_param):
+                campos = [campo.strip() for campo in request.query_params[backend.ordering_param].split(',')]
+                if campos != orden[:len(campos)]:
+                    raise serializers.ValidationError({
+                        backend.ordering_param: f'Con paginación por cursor el orden es {",".join(orden)}.'
+                    })
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.usa_cursor(request, view):
+            self.validar_orden_cursor(request, view)
+            self.keyset = PaginacionKeyset()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,28 @@
+from contextvars import ContextVar
+
+# Por defecto se lee de la primaria: comandos, trabajos en segundo plano y
+# cualquier código fuera de una petición GET marcada por replica_middleware
+usar_primaria = ContextVar('usar_primaria', default=True)
+
+
+class ReplicaRouter:
+    """
+    Envía las lecturas de peticiones seguras a la réplica y todo lo demás
+    (escrituras y lecturas tras una escritura reciente) a la primaria.
+    """
+    replica = 'replica'
+
+    def db_for_read(self, model, **hints):
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db:
+            return instancia._state.db
+        return 'default' if usar_primaria.get() else self.replica
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
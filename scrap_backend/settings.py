@@ -32,6 +32,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Librerías de terceros
     'rest_framework',   
@@ -45,7 +46,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'usuarios.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -57,10 +58,58 @@ REST_FRAMEWORK = {
     ],
 
     'DATETIME_FORMAT': "%d-%m-%Y %H:%M:%S",
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'scrap_backend.pagination.PaginacionFlexible',
     'PAGE_SIZE': 10,
 }
 
+# Segundos que se reutiliza el COUNT(*) de la paginación por número de página (0 = sin caché)
+PAGINACION_CONTEO_SEGUNDOS = int(os.getenv('PAGINACION_CONTEO_SEGUNDOS', '30'))
+PAGINACION_CONTEO_MINIMO = int(os.getenv('PAGINACION_CONTEO_MINIMO', '1000'))
+
+# Filas por INSERT en la importación masiva de productos (se puede cambiar con ?lote=)
+IMPORTACION_TAMANO_LOTE = int(os.getenv('IMPORTACION_TAMANO_LOTE', '1000'))
+IMPORTACION_MAX_ERRORES = 100
+# Filas que la exportación lee por vuelta del cursor del servidor
+EXPORTACION_TAMANO_BLOQUE = int(os.getenv('EXPORTACION_TAMANO_BLOQUE', '2000'))
+
+# Procesamiento de imágenes fuera de la petición (pool de hilos local + tabla TRABAJOS_IMAGENES)
+IMAGENES_TRABAJADORES = int(os.getenv('IMAGENES_TRABAJADORES', '2'))
+IMAGENES_FORMATO = os.getenv('IMAGENES_FORMATO', 'WEBP')
+IMAGENES_CALIDAD = int(os.getenv('IMAGENES_CALIDAD', '85'))
+
+# Purga de productos e imágenes eliminados (filas y archivos) en segundo plano.
+# Con retención > 0 no se purga al eliminar: queda para el comando purgar_eliminados
+PURGA_TAMANO_LOTE = int(os.getenv('PURGA_TAMANO_LOTE', '500'))
+PURGA_RETENCION_MINUTOS = int(os.getenv('PURGA_RETENCION_MINUTOS', '0'))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# LocMemCache es de cada proceso: lo que se invalida en un worker no llega a los demás.
+# Con varios workers de gunicorn usa una caché compartida (Redis, Memcached, base de datos)
+CACHE_COMPARTIDA = not CACHES['default']['BACKEND'].endswith('LocMemCache')
+
+# Caché de autenticación por token: LRU en memoria por proceso o, si se indica
+# TOKEN_CACHE_ALIAS, solo ese alias de CACHES compartido entre procesos (p. ej.
+# 'default' con Redis), para que logout y desactivación se apliquen en todos
+TOKEN_CACHE_SEGUNDOS = int(os.getenv('TOKEN_CACHE_SEGUNDOS', '60'))
+TOKEN_CACHE_MAXIMO = int(os.getenv('TOKEN_CACHE_MAXIMO', '10000'))
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS') or None
+
+# Respuestas GET de categorías; se invalidan al crear/editar/borrar una categoría.
+# Sin caché compartida la versión también caduca, y por defecto en 30 s
+CATEGORIAS_CACHE_SEGUNDOS = int(os.getenv('CATEGORIAS_CACHE_SEGUNDOS', '86400' if CACHE_COMPARTIDA else '30'))
+
+# Conteos de facetas del catálogo público; se recalculan como mucho una vez por ventana
+CATALOGO_FACETAS_SEGUNDOS = int(os.getenv('CATALOGO_FACETAS_SEGUNDOS', '60'))
+
+# Cubetas por categoría del histograma de precios (refrescar_histograma)
+HISTOGRAMA_CUBETAS = int(os.getenv('HISTOGRAMA_CUBETAS', '20'))
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -72,6 +121,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Cabecera Server-Timing y log con tiempo de conexión vs. consultas por petición
+if os.getenv('DB_INSTRUMENTACION', 'False') == 'True':
+    MIDDLEWARE.insert(0, 'scrap_backend.middleware.tiempo_base_datos_middleware')
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  
     "https://scrap-frontend-amber.vercel.app",
@@ -98,25 +151,97 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'scrap_backend.wsgi.application'
+ASGI_APPLICATION = 'scrap_backend.asgi.application'
+
+# Sirve los GET de detalle, mis-productos y categorías con vistas async (usar con ASGI/uvicorn)
+LECTURA_ASYNC = os.getenv('LECTURA_ASYNC', 'False') == 'True'
+
+# mis-productos se serializa desde .values() sin instanciar modelos (mismo JSON)
+SERIALIZADOR_RAPIDO_PRODUCTOS = os.getenv('SERIALIZADOR_RAPIDO_PRODUCTOS', 'False') == 'True'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': os.getenv('DB_NAME'),
-        'USER': os.getenv('DB_USER'),
-        'PASSWORD': os.getenv('DB_PASSWORD'),
-        'HOST': os.getenv('DB_HOST'),
-        'PORT': os.getenv('DB_PORT'),
-        'OPTIONS': {
-            'sslmode': 'require',
-        },
+if os.getenv('DB_ENGINE', 'postgresql') == 'sqlite':
+    # Base de datos local para desarrollo (DB_ENGINE=sqlite)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+        }
     }
+else:
+    # Conexiones persistentes por defecto (DB_CONN_MAX_AGE segundos, con health check).
+    # Con LECTURA_ASYNC (ASGI) el valor por defecto es 0: Django desaconseja las conexiones
+    # persistentes bajo ASGI. Ahí lo recomendado es DB_POOL=True, el pool de Django 5.1+
+    # (psycopg 3 con el extra pool, incluido en requirements.txt).
+    DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'scrap_backend.db.postgresql',
+            'NAME': os.getenv('DB_NAME'),
+            'USER': os.getenv('DB_USER'),
+            'PASSWORD': os.getenv('DB_PASSWORD'),
+            'HOST': os.getenv('DB_HOST'),
+            'PORT': os.getenv('DB_PORT'),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '0' if LECTURA_ASYNC else '600')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'sslmode': 'require',
+            },
+        }
+    }
+
+    if DB_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX', '10')),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        }
+
+
+# Hasher de contraseñas: PASSWORD_HASHER=pbkdf2 | argon2 (requiere argon2-cffi) | bcrypt (requiere bcrypt).
+# El preferido va primero; el resto solo verifica hashes antiguos, que se regeneran
+# con el preferido en el siguiente login (check_password los actualiza).
+PBKDF2_ITERACIONES = int(os.getenv('PBKDF2_ITERACIONES', '1000000'))
+
+HASHERS_DISPONIBLES = {
+    'pbkdf2': 'usuarios.hashers.PBKDF2AjustableHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
 }
 
+PASSWORD_HASHERS = [HASHERS_DISPONIBLES[os.getenv('PASSWORD_HASHER', 'pbkdf2')]] + [
+    hasher for nombre, hasher in HASHERS_DISPONIBLES.items()
+    if nombre != os.getenv('PASSWORD_HASHER', 'pbkdf2')
+]
+
+
+# Réplica de lectura opcional: DB_REPLICA_HOST y/o DB_REPLICA_NAME (otra base PostgreSQL u otro archivo SQLite).
+# Las lecturas de GET van a la réplica salvo durante REPLICA_PEGAJOSA_SEGUNDOS tras una escritura
+# del mismo cliente; para que esto funcione entre procesos CACHES debe ser compartida.
+REPLICA_PEGAJOSA_SEGUNDOS = int(os.getenv('REPLICA_PEGAJOSA_SEGUNDOS', '5'))
+
+if os.getenv('DB_REPLICA_HOST') or os.getenv('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME') or DATABASES['default']['NAME'],
+        'OPTIONS': {**DATABASES['default'].get('OPTIONS', {})},
+        # En los tests la réplica es la misma base de prueba que la primaria
+        'TEST': {'MIRROR': 'default'},
+    }
+    if os.getenv('DB_REPLICA_HOST'):
+        DATABASES['replica'].update({
+            'HOST': os.getenv('DB_REPLICA_HOST'),
+            'PORT': os.getenv('DB_REPLICA_PORT') or DATABASES['default']['PORT'],
+            'USER': os.getenv('DB_REPLICA_USER') or DATABASES['default']['USER'],
+            'PASSWORD': os.getenv('DB_REPLICA_PASSWORD') or DATABASES['default']['PASSWORD'],
+        })
+    DATABASE_ROUTERS = ['scrap_backend.routers.ReplicaRouter']
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.contrib.sessions.middleware.SessionMiddleware'), 'scrap_backend.middleware.replica_middleware')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -0,0 +1,89 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from productos.models import Categoria
+from scrap_backend.middleware import replica_middleware
+from scrap_backend.routers import ReplicaRouter, usar_primaria
+from usuarios.models import Usuario
+from usuarios.views import LoginUsuarioView
+
+
+class ReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_lecturas_segun_peticion(self):
+        token = usar_primaria.set(False)
+        self.addCleanup(usar_primaria.reset, token)
+        self.assertEqual(self.router.db_for_read(Categoria), 'replica')
+        usar_primaria.set(True)
+        self.assertEqual(self.router.db_for_read(Categoria), 'default')
+
+    def test_fuera_de_peticion_usa_primaria(self):
+        self.assertEqual(self.router.db_for_read(Categoria), 'default')
+
+    def test_escrituras_a_primaria(self):
+        token = usar_primaria.set(False)
+        self.addCleanup(usar_primaria.reset, token)
+        self.assertEqual(self.router.db_for_write(Categoria), 'default')
+
+    def test_relacionados_de_la_misma_base(self):
+        categoria = Categoria(nombre='Metales')
+        categoria._state.db = 'default'
+        token = usar_primaria.set(False)
+        self.addCleanup(usar_primaria.reset, token)
+        self.assertEqual(self.router.db_for_read(Categoria, instance=categoria), 'default')
+
+
+@override_settings(REPLICA_PEGAJOSA_SEGUNDOS=5)
+class ReplicaMiddlewareTests(TestCase):
+    """Lecturas a la réplica salvo justo después de una escritura del mismo cliente."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.bases = []
+
+        def vista(request):
+            self.bases.append(ReplicaRouter().db_for_read(Categoria))
+            return HttpResponse(status=400 if request.GET.get('falla') else 200)
+
+        self.middleware = replica_middleware(vista)
+
+    def peticion(self, metodo, token='abc', **extra):
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Token {token}'
+        self.middleware(getattr(self.factory, metodo)('/', **extra))
+        return self.bases[-1]
+
+    def test_metodos(self):
+        self.assertEqual(self.peticion('get'), 'replica')
+        self.assertEqual(self.peticion('head'), 'replica')
+        self.assertEqual(self.peticion('post'), 'default')
+        self.assertEqual(self.peticion('delete', token='otro'), 'default')
+
+    def test_ventana_pegajosa(self):
+        self.peticion('post')
+        self.assertEqual(self.peticion('get'), 'default')
+        self.assertEqual(self.peticion('get', token='otro'), 'replica')
+
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=time.time() + 6):
+            self.assertEqual(self.peticion('get'), 'replica')
+
+    def test_escritura_fallida_no_es_pegajosa(self):
+        self.peticion('post', QUERY_STRING='falla=1')
+        self.assertEqual(self.peticion('get'), 'replica')
+
+    def test_login_marca_el_token_emitido(self):
+        usuario = Usuario.objects.create_user('Negocio', 'negocio@test.com', 'clave', '3000000001', 'Calle 1')
+        login = replica_middleware(LoginUsuarioView.as_view())
+        response = login(self.factory.post(
+            '/', {'correo': 'negocio@test.com', 'password': 'clave'}, content_type='application/json'
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.peticion('get', token=usuario.auth_token.key), 'default')
@@ -0,0 +1,120 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+
+class CacheLRU:
+    """Diccionario LRU con expiración, seguro entre hilos."""
+
+    def __init__(self, maximo, segundos):
+        self.maximo = maximo
+        self.segundos = segundos
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def set(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.segundos)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+
+cache_tokens = CacheLRU(settings.TOKEN_CACHE_MAXIMO, settings.TOKEN_CACHE_SEGUNDOS)
+
+
+def cache_compartida():
+    alias = settings.TOKEN_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+def clave_compartida(key):
+    return f'token:{key}'
+
+
+def invalidar_token(key):
+    cache_tokens.delete(key)
+    compartida = cache_compartida()
+    if compartida is not None:
+        compartida.delete(clave_compartida(key))
+
+
+def invalidar_tokens_de_usuario(usuario):
+    for key in Token.objects.filter(user=usuario).values_list('key', flat=True):
+        invalidar_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication que guarda (usuario, token) en caché. Si
+    TOKEN_CACHE_ALIAS está configurado se usa solo esa caché compartida, para
+    que logout, desactivación y actualización de usuarios revoquen el token
+    en todos los procesos a la vez. Sin ella se usa un LRU en memoria por
+    proceso: los demás procesos descartan la entrada tras TOKEN_CACHE_SEGUNDOS.
+    """
+
+    def authenticate_credentials(self, key):
+        compartida = cache_compartida()
+
+        if compartida is None:
+            resultado = cache_tokens.get(key)
+            if resultado is None:
+                resultado = super().authenticate_credentials(key)
+                cache_tokens.set(key, resultado)
+        else:
+            resultado = compartida.get(clave_compartida(key))
+            if resultado is None:
+                resultado = super().authenticate_credentials(key)
+                compartida.set(clave_compartida(key), resultado, settings.TOKEN_CACHE_SEGUNDOS)
+
+        usuario, token = resultado
+        # Copia para que cada petición trabaje con su propia instancia
+        return copy.copy(usuario), token
+
+
+async def autenticar_async(request):
+    """
+    Autenticación por token para vistas async nativas. Con el token en caché
+    no sale del event loop; si no, delega en CachedTokenAuthentication.
+    Devuelve (usuario, token) o None; lanza AuthenticationFailed si es inválido.
+    """
+    autenticador = CachedTokenAuthentication()
+    partes = get_authorization_header(request).split()
+    if len(partes) == 2 and partes[0].lower() == autenticador.keyword.lower().encode():
+        key = partes[1].decode(errors='ignore')
+        compartida = cache_compartida()
+        if compartida is None:
+            resultado = cache_tokens.get(key)
+        else:
+            resultado = await compartida.aget(clave_compartida(key))
+        if resultado is not None:
+            usuario, token = resultado
+            return copy.copy(usuario), token
+    return await sync_to_async(autenticador.authenticate)(request)
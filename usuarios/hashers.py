@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2AjustableHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 con las iteraciones de PBKDF2_ITERACIONES. Usa el mismo algoritmo
+    que el hasher de Django, así que los hashes existentes se verifican y se
+    vuelven a generar al iniciar sesión si sus iteraciones no coinciden.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERACIONES
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from usuarios.hashers import PBKDF2AjustableHasher
+from usuarios.models import Usuario
+from usuarios.views import LoginUsuarioView
+
+CONTRASENA = 'contraseña-de-prueba'
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide logins por segundo de un worker con el hasher configurado y distintas iteraciones de PBKDF2.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segundos', type=float, default=3.0, help='Duración de cada medición')
+        parser.add_argument('--iteraciones', nargs='*', type=int, default=[100_000, 300_000, 600_000, 1_000_000])
+
+    def por_segundo(self, funcion, segundos):
+        total = 0
+        inicio = time.perf_counter()
+        while time.perf_counter() - inicio < segundos:
+            funcion()
+            total += 1
+        return total / (time.perf_counter() - inicio)
+
+    def handle(self, *args, **options):
+        segundos = options['segundos']
+
+        self.stdout.write('Verificación de hash PBKDF2 (un hilo):')
+        for iteraciones in options['iteraciones']:
+            hasher = PBKDF2AjustableHasher()
+            codificado = hasher.encode(CONTRASENA, hasher.salt(), iteraciones)
+            tasa = self.por_segundo(lambda: hasher.verify(CONTRASENA, codificado), segundos)
+            self.stdout.write(f'  {iteraciones:>9} iteraciones: {tasa:8.1f} verificaciones/s')
+
+        hasher = get_hasher()
+        self.stdout.write(f'\nLogin completo con el hasher preferido ({hasher.algorithm}):')
+        try:
+            with transaction.atomic():
+                Usuario.objects.create_user(
+                    nombre_negocio='__benchmark__',
+                    correo='benchmark@example.com',
+                    password=CONTRASENA,
+                    telefono='0000000000',
+                    direccion='benchmark'
+                )
+                vista = LoginUsuarioView.as_view()
+                fabrica = APIRequestFactory()
+                datos = {'correo': 'benchmark@example.com', 'password': CONTRASENA}
+
+                def login():
+                    respuesta = vista(fabrica.post('/api/usuarios/login/', datos, format='json'))
+                    assert respuesta.status_code == 200, respuesta.data
+
+                tasa = self.por_segundo(login, segundos)
+                self.stdout.write(f'  {tasa:8.1f} logins/s por worker ({1000 / tasa:.1f} ms por login)')
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f'\nPBKDF2_ITERACIONES={settings.PBKDF2_ITERACIONES}')
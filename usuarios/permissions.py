@@ -1,5 +1,4 @@
 from rest_framework import permissions
-from rest_framework.authtoken.models import Token
 
 class IsAdminWithValidToken(permissions.BasePermission):
     message = 'No tienes permisos de administrador o tu token ha expirado.'
@@ -13,19 +12,9 @@ class IsAdminWithValidToken(permissions.BasePermission):
             self.message = 'No tienes permisos de administrador.'
             return False
         
-        try:
-            auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            
-            if not auth_header.startswith('Token '):
-                self.message = 'Token de autenticación inválido.'
-                return False
-            
-            return True
-            
-        except Token.DoesNotExist:
-            self.message = 'Token inválido o sesión cerrada. Por favor, inicia sesión nuevamente.'
+        # La autenticación por token ya validó la cabecera; con sesión no hay token
+        if request.auth is None:
+            self.message = 'Token de autenticación inválido.'
             return False
-        except Exception as e:
-            self.message = f'Error al validar token: {str(e)}'
-            return False
-
+        
+        return True
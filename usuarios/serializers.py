@@ -1,7 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
+from productos.models import Producto
+from scrap_backend.campos import CamposDinamicosMixin
+from scrap_backend.cambios import aplicar_cambios
 from .models import Usuario
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = Usuario
         fields = [
@@ -48,6 +52,16 @@ class ActualizarUsuarioSerializer(serializers.ModelSerializer):
             'direccion',
             'correo'
         ]
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        cambiados = aplicar_cambios(instance, validated_data)
+        if cambiados:
+            instance.save(update_fields=cambiados)
+        if 'nombre_negocio' in cambiados:
+            # El detalle de sus productos muestra el nombre: cambia su ETag
+            Producto.objects.filter(id_negocio=instance).incrementar_version()
+        return instance
     
 class LoginSerializer(serializers.Serializer):
     correo = serializers.EmailField()
@@ -57,7 +71,15 @@ class LoginSerializer(serializers.Serializer):
         correo = attrs.get('correo')
         password = attrs.get('password')
         
-        usuario = Usuario.objects.get(correo=correo)
+        usuario = Usuario.objects.filter(correo=correo).first()
+        
+        if usuario is None:
+            # Mismo costo de hash que un usuario existente para no revelar qué correos existen
+            Usuario().set_password(password)
+            raise serializers.ValidationError(
+                'Credenciales incorrectas',
+                code='authorization'
+            )
         
         if not usuario.check_password(password):
             raise serializers.ValidationError(
@@ -0,0 +1,110 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from productos.tests import columnas_actualizadas
+from usuarios.authentication import cache_tokens
+from usuarios.models import Usuario
+
+
+def crear_usuario(numero=1, **extra):
+    return Usuario.objects.create_user(
+        f'Negocio {numero}', f'negocio{numero}@test.com', 'clave', f'300000000{numero}', 'Calle 1', **extra
+    )
+
+
+class LoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_login_devuelve_token(self):
+        response = self.client.post(
+            reverse('usuarios:login'), {'correo': 'negocio1@test.com', 'password': 'clave'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['token'], self.usuario.auth_token.key)
+
+    def test_login_credenciales_incorrectas(self):
+        response = self.client.post(
+            reverse('usuarios:login'), {'correo': 'negocio1@test.com', 'password': 'otra'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class RevocacionTokenTests(TestCase):
+    """Un token revocado se rechaza en la siguiente petición, sin esperar a la caché."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario()
+        cls.admin = crear_usuario(2, is_superuser=True)
+
+    def setUp(self):
+        cache.clear()
+        cache_tokens.clear()
+        self.token = Token.objects.create(user=self.usuario)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('productos:mis-productos')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def desactivar(self):
+        admin = APIClient()
+        admin.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.admin).key}')
+        self.assertEqual(admin.patch(reverse('usuarios:toggle-estado', args=[self.usuario.pk])).status_code, 200)
+
+    def test_logout(self):
+        self.assertEqual(self.client.post(reverse('usuarios:logout')).status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_desactivar(self):
+        self.desactivar()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    @override_settings(TOKEN_CACHE_ALIAS='default')
+    def test_caches_de_otro_proceso(self):
+        # Con caché compartida no se consulta el LRU local (que en otro proceso seguiría vigente)
+        self.client.get(self.url)
+        self.desactivar()
+        cache_tokens.set(self.token.key, (self.usuario, self.token))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class EscriturasParcialesTests(TestCase):
+    """Las actualizaciones de usuarios escriben solo las columnas que cambian."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = crear_usuario()
+        cls.admin = crear_usuario(2, is_superuser=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def columnas(self, metodo, url, datos=None):
+        with CaptureQueriesContext(connection) as consultas:
+            response = getattr(self.client, metodo)(url, datos, format='json')
+        self.assertEqual(response.status_code, 200)
+        return columnas_actualizadas(consultas, 'USUARIOS')
+
+    def test_actualizar_solo_columnas_modificadas(self):
+        self.client.force_authenticate(self.usuario)
+        url = reverse('usuarios:actualizar-usuario', args=[self.usuario.pk])
+        self.assertEqual(self.columnas('put', url, {'direccion': 'Calle 9'}), [['direccion']])
+        self.assertEqual(self.columnas('put', url, {'direccion': 'Calle 9'}), [])
+
+    def test_desactivar(self):
+        self.client.force_authenticate(self.admin, token='token')
+        url = reverse('usuarios:toggle-estado', args=[self.usuario.pk])
+        self.assertEqual(self.columnas('patch', url), [['estado']])
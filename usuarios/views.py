@@ -9,8 +9,11 @@ from .serializers import (
     ActualizarUsuarioSerializer,
     LoginSerializer
 )
+from .authentication import CachedTokenAuthentication, invalidar_token, invalidar_tokens_de_usuario
 from .models import Usuario
 from .permissions import IsAdminWithValidToken
+from scrap_backend.campos import CamposDinamicosVistaMixin
+from scrap_backend.middleware import emitir_credencial
 
 class RegistroUsuarioView(generics.CreateAPIView):
     queryset = Usuario.objects.all()
@@ -56,6 +59,7 @@ class ActualizarUsuarioView(APIView):
 
         try:
             serializer.save()
+            invalidar_tokens_de_usuario(usuario)
             return Response({
                 'message': 'Usuario actualizado exitosamente',
                 'user': UsuarioSerializer(usuario).data,
@@ -87,6 +91,7 @@ class LoginUsuarioView(APIView):
         user = serializer.validated_data['user']
         
         token, created = Token.objects.get_or_create(user=user)
+        emitir_credencial(request._request, f'{CachedTokenAuthentication.keyword} {token.key}')
 
         return Response({
             'message': 'Login exitoso',
@@ -100,8 +105,9 @@ class LogoutUsuarioView(APIView):
     
     def post(self, request):
         try:
-            print(request.user)
-            request.user.auth_token.delete()
+            token = request.user.auth_token
+            invalidar_token(token.key)
+            token.delete()
             mensaje = f'Logout exitoso para {request.user.correo}'
             
         except Token.DoesNotExist:
@@ -119,10 +125,11 @@ class LogoutUsuarioView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class ListarUsuariosView(generics.ListAPIView):
+class ListarUsuariosView(CamposDinamicosVistaMixin, generics.ListAPIView):
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
     permission_classes = [IsAdminWithValidToken]
+    orden_keyset = ('-fecha_registro', '-id')
     
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -142,7 +149,8 @@ class DesactivarUsuarioView(APIView):
             usuario = Usuario.objects.get(pk=pk)
             
             usuario.is_active = not usuario.is_active
-            usuario.save()
+            usuario.save(update_fields=['is_active'])
+            invalidar_tokens_de_usuario(usuario)
             
             return Response({
                 'message': f'Usuario {"activado" if usuario.is_active else "desactivado"} exitosamente',